@@ -1,43 +1,196 @@
+import hashlib
 import json
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
-from .db import get_db
+from typing import Iterable, Optional
+
+from app.config import settings
+from .db import get_cache_db, run_cache_write, run_write
+from .memory import MISS, MemoryCache
+
+# stored_at is when the payload was fetched, so callers can judge its age;
+# etag is a hash of the stored JSON, for conditional requests
+CacheEntry = namedtuple("CacheEntry", ["value", "stored_at", "expires_at", "etag"])
+
+# Statements checked by app/db/query_plans.py; "{tags}" is one "?" per tag
+CACHE_ENTRY_SELECT = "SELECT value, stored_at, expires_at FROM cache WHERE key=?"
+TAG_KEYS_SELECT = "SELECT key FROM cache_tags WHERE tag IN ({tags})"
+TAG_INVALIDATION = """
+    DELETE FROM cache WHERE key IN (
+        SELECT key FROM cache_tags WHERE tag IN ({tags})
+    )
+"""
+PREFIX_INVALIDATION = "DELETE FROM cache WHERE key >= ? AND key < ?"
+TAGS_DELETE_FOR_KEY = "DELETE FROM cache_tags WHERE key = ?"
+
+memory_cache = MemoryCache(settings.CACHE_MEMORY_MAX_BYTES, settings.CACHE_MEMORY_MAX_ENTRY_BYTES)
+
+# Reads don't write last_access themselves; the maintenance task flushes
+# the latest access time per key in one batch before it evicts.
+_access_times = {}
+_access_lock = threading.Lock()
+
+
+def _record_access(key: str) -> None:
+    with _access_lock:
+        _access_times[key] = int(time.time())
+
+
+def flush_access_times() -> int:
+    """Persist recorded access times to cache.last_access; returns the number of keys"""
+    with _access_lock:
+        pending = list(_access_times.items())
+        _access_times.clear()
+    if not pending:
+        return 0
+
+    def write(db):
+        db.executemany("UPDATE cache SET last_access = MAX(COALESCE(last_access, 0), ?) WHERE key = ?",
+                       [(accessed, key) for key, accessed in pending])
+
+    run_cache_write(write)
+    return len(pending)
+
+
+def _payload_etag(payload) -> str:
+    """payload is the stored JSON: text, or bytes for rows copied from a spool"""
+    return _chunks_etag([payload.encode() if isinstance(payload, str) else payload])
+
+
+def _chunks_etag(chunks: Iterable[bytes]) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return '"' + digest.hexdigest()[:32] + '"'
+
+
+def get_memory_cache(key: str):
+    """Memory tier only; returns the CacheEntry, or MISS when it is not held in memory"""
+    entry = memory_cache.get(key)
+    if entry is not MISS:
+        _record_access(key)
+    return entry
+
+
+def get_cache_entry(key: str) -> Optional[CacheEntry]:
+    entry = get_memory_cache(key)
+    if entry is not MISS:
+        return entry
+    return get_persisted_cache_entry(key)
 
 
 def get_cache(key: str):
-    db = get_db()
-    row = db.execute(
-        "SELECT value, expires_at FROM cache WHERE key=?", (key,)).fetchone()
+    entry = get_cache_entry(key)
+    return entry.value if entry is not None else None
+
+
+def get_persisted_cache_entry(key: str) -> Optional[CacheEntry]:
+    """Read from SQLite, skipping the memory tier, and promote the entry into it"""
+    with get_cache_db() as db:
+        row = db.execute(CACHE_ENTRY_SELECT, (key,)).fetchone()
+
+        if not row:
+            return None
+
+        expires = datetime.fromisoformat(row["expires_at"])
+        if datetime.utcnow() > expires:
+            return None
+
+        entry = CacheEntry(json.loads(row["value"]), datetime.fromisoformat(row["stored_at"]), expires,
+                           _payload_etag(row["value"]))
+        memory_cache.set(key, entry, expires, len(row["value"]))
+        _record_access(key)
+        return entry
+
 
-    if not row:
-        return None
+def set_cache(key: str, value, ttl_hours: float, tags: Iterable[str] = (),
+              spool=None) -> CacheEntry:
+    """
+    Store value for ttl_hours; the row is deleted by the reaper after that.
+    tags (e.g. "user:123", "season:4521") let invalidate_tags() drop it.
+    spool is the SpooledPayload value was decoded from; its bytes are
+    copied into the row in chunks instead of encoding value again, so the
+    JSON text is never held whole.
+    """
+    stored = datetime.utcnow()
+    expires = stored + timedelta(hours=ttl_hours)
+    tags = sorted(set(tags))
+    if spool is None:
+        payload = json.dumps(value)
+        size, etag = len(payload), _payload_etag(payload)
+    else:
+        payload = None
+        size, etag = spool.size, _chunks_etag(spool.iter_bytes())
+    entry = CacheEntry(value, stored, expires, etag)
 
-    if datetime.utcnow() > datetime.fromisoformat(row["expires_at"]):
-        return None
+    def write(db):
+        row_id = db.execute("""
+            REPLACE INTO cache (key, value, stored_at, expires_at, last_access, size)
+            VALUES (?, COALESCE(?, zeroblob(?)), ?, ?, ?, ?)
+        """, (key, payload, size, stored.isoformat(), expires.isoformat(), int(time.time()), size)).lastrowid
+        if spool is not None:
+            with db.blobopen("cache", "value", row_id) as blob:
+                for chunk in spool.iter_bytes():
+                    blob.write(chunk)
+        # REPLACE does not fire the delete trigger, so clear old tags here
+        db.execute(TAGS_DELETE_FOR_KEY, (key,))
+        db.executemany("INSERT INTO cache_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
 
-    return json.loads(row["value"])
+    run_cache_write(write)
+    # Only once the row is stored, so invalidate_tags() can always reach it
+    memory_cache.set(key, entry, expires, size)
+    return entry
 
 
-def set_cache(key: str, value, ttl_hours: int):
-    expires = datetime.utcnow() + timedelta(hours=ttl_hours)
-    db = get_db()
-    db.execute("REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
-               (key, json.dumps(value), expires.isoformat())
-               )
-    db.commit()
+def invalidate_tags(tags: Iterable[str]) -> int:
+    """Delete every entry carrying any of tags; returns the number deleted"""
+    tags = list(set(tags))
+    if not tags:
+        return 0
+
+    def write(db):
+        placeholders = ", ".join("?" for _ in tags)
+        # Deduplicated here rather than with DISTINCT, which sorts in a temp b-tree
+        keys = {row[0] for row in db.execute(TAG_KEYS_SELECT.format(tags=placeholders), tags).fetchall()}
+        db.execute(TAG_INVALIDATION.format(tags=placeholders), tags)
+        return keys
+
+    keys = run_cache_write(write)
+    for key in keys:
+        memory_cache.delete(key)
+    return len(keys)
+
+
+def invalidate_prefix(prefix: str) -> int:
+    """Delete every entry whose key starts with prefix; returns the number deleted"""
+    if not prefix:
+        raise ValueError("Refusing to invalidate the whole cache with an empty prefix")
+    # A key range rather than LIKE, so the delete walks the primary key index
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def write(db):
+        return db.execute(PREFIX_INVALIDATION, (prefix, upper)).rowcount
+
+    deleted = run_cache_write(write)
+    memory_cache.delete_prefix(prefix)
+    return deleted
 
 
 def save_iracing_token(user_id, display_name, access, refresh, expires):
-    db = get_db()
-    db.execute(
-        """
-        INSERT INTO users (user_id, display_name, iracing_access_token, iracing_refresh_token, token_expires)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            display_name = excluded.display_name,
-            iracing_access_token = excluded.iracing_access_token,
-            iracing_refresh_token = excluded.iracing_refresh_token,
-            token_expires = excluded.token_expires
-        """,
-        (user_id, display_name, access, refresh, expires)
-    )
-    db.commit()
+    def write(db):
+        db.execute(
+            """
+            INSERT INTO users (user_id, display_name, iracing_access_token, iracing_refresh_token, token_expires)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                display_name = excluded.display_name,
+                iracing_access_token = excluded.iracing_access_token,
+                iracing_refresh_token = excluded.iracing_refresh_token,
+                token_expires = excluded.token_expires
+            """,
+            (user_id, display_name, access, refresh, expires)
+        )
+
+    run_write(write)
@@ -1,30 +1,387 @@
 import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+from queue import Empty, LifoQueue, Queue
 
-DB_PATH = "iracing.db"
+from app.config import settings
 
+DB_PATH = settings.DB_PATH
+CACHE_DB_PATH = settings.CACHE_DB_PATH
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+# Applied once when a pooled connection is opened, not per query.
+APP_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": settings.DB_BUSY_TIMEOUT_MS,
+    "mmap_size": settings.DB_MMAP_SIZE,
+    "cache_size": -settings.DB_CACHE_SIZE_KB,
+}
+
+# Pooled connections only read; every write goes through the WriteQueue.
+READ_PRAGMAS = {**APP_PRAGMAS, "query_only": "ON"}
+
+# NORMAL by default, like APP_PRAGMAS; with FULL, one fsync per group
+# commit instead of per write.
+WRITE_PRAGMAS = {**APP_PRAGMAS, "synchronous": settings.DB_WRITE_SYNCHRONOUS}
+
+# The response cache can always be refetched from iRacing, so it trades
+# durability for throughput. page_size and auto_vacuum must come before
+# journal_mode: they only apply while the file is still empty.
+CACHE_PRAGMAS = {
+    "page_size": settings.CACHE_DB_PAGE_SIZE,
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "busy_timeout": settings.DB_BUSY_TIMEOUT_MS,
+    "mmap_size": settings.DB_MMAP_SIZE,
+    "cache_size": -settings.CACHE_DB_CACHE_SIZE_KB,
+}
+CACHE_READ_PRAGMAS = {**CACHE_PRAGMAS, "query_only": "ON"}
+
+
+def open_connection(path: str, pragmas: dict) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
     return conn
 
 
-def init_db():
-    db = get_db()
-    db.execute("""
-    CREATE TABLE IF NOT EXISTS cache(
-        key TEXT PRIMARY KEY,
-        VALUE TEXT,
-        expires_at TEXT
-    )
-    """)
-    db.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY,
-        display_name TEXT,
-        iracing_access_token TEXT,
-        iracing_refresh_token TEXT,
-        token_expires INTEGER
-    );
-    """)
-    db.commit()
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+
+    A thread keeps the connection it checked out until its outermost
+    `connection()` block exits, so nested query helpers reuse it instead of
+    opening their own.
+    """
+
+    def __init__(self, path: str, size: int, timeout: float, pragmas: dict):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._opened = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _checkout(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.OperationalError("Connection pool is closed")
+
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for a database connection")
+        waited = time.perf_counter() - started
+
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            try:
+                conn = open_connection(self.path, self.pragmas)
+            except Exception:
+                self._slots.release()
+                raise
+            with self._lock:
+                self._opened += 1
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        try:
+            # Never hand a half-finished transaction to the next caller
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+                with self._lock:
+                    self._opened -= 1
+            else:
+                self._idle.put(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._checkin(conn)
+
+    def close(self) -> None:
+        """Close idle connections; in-use ones are closed when returned"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._opened,
+                "in_use": self._in_use,
+                "idle": self._opened - self._in_use,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "wait_total_ms": round(self._wait_total * 1000, 3),
+                "wait_avg_ms": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+_WriteOp = namedtuple("_WriteOp", ["fn", "future"])
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Single writer thread that applies queued writes in group commits.
+
+    A write is a function taking the writer connection. The writer drains
+    up to `max_batch` queued writes (waiting at most `max_delay_ms` for more),
+    runs each in its own savepoint inside one transaction, commits once and
+    then resolves every caller's future. A failing write only rolls back its
+    own savepoint. Writes must not call commit() themselves.
+    """
+
+    def __init__(self, path: str, pragmas: dict, max_batch: int, max_delay_ms: float):
+        self.path = path
+        self.pragmas = pragmas
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue = Queue()
+        self._thread = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._writes = 0
+        self._failed = 0
+        self._batches = 0
+        self._max_batch_seen = 0
+        self._commit_total = 0.0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn) -> Future:
+        """Queue fn(db) and return a future resolved once its transaction commits"""
+        if self._closed:
+            raise sqlite3.OperationalError("Write queue is closed")
+        self._start()
+        future = Future()
+        self._queue.put(_WriteOp(fn, future))
+        return future
+
+    def execute(self, fn):
+        """Run fn(db) through the queue and block until it is committed"""
+        if threading.current_thread() is self._thread:
+            # A write issued from inside another write joins its transaction
+            return fn(self._conn)
+        return self.submit(fn).result()
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        self._conn = open_connection(self.path, self.pragmas)
+        self._conn.isolation_level = None
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                ops = [op for op in batch if op is not _STOP]
+                if ops:
+                    self._commit_batch(ops)
+                if stop:
+                    break
+        finally:
+            self._conn.close()
+
+    def _commit_batch(self, ops: list) -> None:
+        outcomes = []
+        started = time.perf_counter()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for op in ops:
+                if not op.future.set_running_or_notify_cancel():
+                    continue
+                self._conn.execute("SAVEPOINT write_op")
+                try:
+                    result = op.fn(self._conn)
+                    self._conn.execute("RELEASE write_op")
+                    outcomes.append((op, result, None))
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO write_op")
+                    self._conn.execute("RELEASE write_op")
+                    outcomes.append((op, None, e))
+            self._conn.execute("COMMIT")
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            for op in ops:
+                if not op.future.done():
+                    op.future.set_exception(e)
+            with self._lock:
+                self._failed += len(ops)
+            return
+
+        elapsed = time.perf_counter() - started
+        for op, result, error in outcomes:
+            if error is None:
+                op.future.set_result(result)
+            else:
+                op.future.set_exception(error)
+
+        with self._lock:
+            self._batches += 1
+            self._writes += len(outcomes)
+            self._failed += sum(1 for outcome in outcomes if outcome[2] is not None)
+            self._max_batch_seen = max(self._max_batch_seen, len(outcomes))
+            self._commit_total += elapsed
+
+    def close(self) -> None:
+        """Finish queued writes and stop the writer thread"""
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "writes": self._writes,
+                "failed": self._failed,
+                "batches": self._batches,
+                "avg_batch": round(self._writes / self._batches, 2) if self._batches else 0.0,
+                "max_batch": self._max_batch_seen,
+                "avg_commit_ms": round(self._commit_total * 1000 / self._batches, 3) if self._batches else 0.0,
+            }
+
+
+_pool = ConnectionPool(DB_PATH, settings.DB_POOL_SIZE,
+                       settings.DB_POOL_TIMEOUT, READ_PRAGMAS)
+_writer = WriteQueue(DB_PATH, WRITE_PRAGMAS,
+                     settings.DB_WRITE_MAX_BATCH, settings.DB_WRITE_MAX_DELAY_MS)
+
+_cache_pool = ConnectionPool(CACHE_DB_PATH, settings.CACHE_DB_POOL_SIZE,
+                             settings.DB_POOL_TIMEOUT, CACHE_READ_PRAGMAS)
+_cache_writer = WriteQueue(CACHE_DB_PATH, CACHE_PRAGMAS,
+                           settings.DB_WRITE_MAX_BATCH, settings.DB_WRITE_MAX_DELAY_MS)
+
+
+def get_db():
+    """
+    Check out a pooled read-only connection for the duration of a `with` block:
+
+        with get_db() as db:
+            db.execute(...)
+    """
+    return _pool.connection()
+
+
+def run_write(fn):
+    """
+    Run fn(db) on the single writer connection and return its result once
+    the group commit containing it is done. fn must not commit.
+
+    The calling thread blocks until then. Async routes reach this through
+    run_db, so each pending write holds a database executor thread for
+    its queue wait plus the commit; see submit_write() for awaiting it
+    without one.
+    """
+    return _writer.execute(fn)
+
+
+def submit_write(fn) -> Future:
+    """
+    Queue fn(db) and return a concurrent.futures.Future for its result.
+    Async code can await asyncio.wrap_future(submit_write(fn)) without
+    holding a thread while the write waits for its group commit.
+    """
+    return _writer.submit(fn)
+
+
+def get_cache_db():
+    """Like get_db(), for the response cache database"""
+    return _cache_pool.connection()
+
+
+def run_cache_write(fn):
+    """Like run_write(), for the response cache database"""
+    return _cache_writer.execute(fn)
+
+
+def close_db():
+    _writer.close()
+    _pool.close()
+    _cache_writer.close()
+    _cache_pool.close()
+
+
+def pool_stats() -> dict:
+    return _pool.stats()
+
+
+def writer_stats() -> dict:
+    return _writer.stats()
+
+
+def cache_pool_stats() -> dict:
+    return _cache_pool.stats()
+
+
+def cache_writer_stats() -> dict:
+    return _cache_writer.stats()
+
@@ -0,0 +1,150 @@
+"""
+Background maintenance for the response cache database
+
+Deletes expired rows in small batches, evicts least recently used rows
+while the cache is over CACHE_MAX_BYTES, and hands freed pages back to the
+filesystem with PRAGMA incremental_vacuum. Each batch is its own write so
+the cache writer is never held for long.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+from app.config import settings
+from app.db.executor import run_db
+from .cache import flush_access_times, memory_cache
+from .db import get_cache_db, run_cache_write
+
+# Walks idx_cache_expires_at; checked by app/db/query_plans.py
+REAP_EXPIRED_BATCH = """
+    DELETE FROM cache WHERE key IN (
+        SELECT key FROM cache WHERE expires_at < ? LIMIT ?
+    )
+"""
+# Walks idx_cache_last_access and stops at LIMIT
+LEAST_RECENTLY_USED = "SELECT key, size FROM cache ORDER BY last_access LIMIT ?"
+
+_lock = threading.Lock()
+_stats = {
+    "runs": 0,
+    "expired_deleted": 0,
+    "evicted": 0,
+    "vacuumed_pages": 0,
+    "last_run_at": None,
+    "last_run_ms": 0.0,
+    "last_error": None,
+}
+_task = None
+
+
+def reap_expired(batch_size: int = settings.CACHE_REAP_BATCH) -> int:
+    """Delete expired rows, batch_size at a time; returns the number deleted"""
+    now = datetime.utcnow().isoformat()
+
+    def write(db):
+        return db.execute(REAP_EXPIRED_BATCH, (now, batch_size)).rowcount
+
+    deleted = 0
+    while True:
+        batch = run_cache_write(write)
+        deleted += batch
+        if batch < batch_size:
+            return deleted
+
+
+def evict_to_size(max_bytes: int = settings.CACHE_MAX_BYTES,
+                  batch_size: int = settings.CACHE_REAP_BATCH) -> int:
+    """Delete least recently used rows until the cache fits in max_bytes"""
+
+    def write(db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= max_bytes:
+            return []
+        victims = []
+        for row in db.execute(LEAST_RECENTLY_USED, (batch_size,)):
+            if total <= max_bytes:
+                break
+            victims.append(row["key"])
+            total -= row["size"] or 0
+        db.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in victims])
+        return victims
+
+    evicted = 0
+    while True:
+        victims = run_cache_write(write)
+        for key in victims:
+            memory_cache.delete(key)
+        evicted += len(victims)
+        if len(victims) < batch_size:
+            return evicted
+
+
+def incremental_vacuum(max_pages: int = settings.CACHE_VACUUM_PAGES) -> int:
+    """Release up to max_pages free pages; returns the number released"""
+    with get_cache_db() as db:
+        free_before = db.execute("PRAGMA freelist_count").fetchone()[0]
+    if not free_before:
+        return 0
+
+    def write(db):
+        # sqlite3 steps a PRAGMA that returns no rows only once, and each
+        # step of incremental_vacuum releases a single page
+        for _ in range(min(free_before, max_pages)):
+            db.execute("PRAGMA incremental_vacuum(1)")
+
+    run_cache_write(write)
+    with get_cache_db() as db:
+        return free_before - db.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def run_maintenance() -> dict:
+    """One full maintenance pass; returns what it did"""
+    started = time.perf_counter()
+    flush_access_times()
+    result = {
+        "expired_deleted": reap_expired(),
+        "evicted": evict_to_size(),
+        "vacuumed_pages": incremental_vacuum(),
+    }
+    with _lock:
+        _stats["runs"] += 1
+        for name, count in result.items():
+            _stats[name] += count
+        _stats["last_run_at"] = datetime.utcnow().isoformat()
+        _stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _stats["last_error"] = None
+    return result
+
+
+async def _maintenance_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_db(run_maintenance)
+        except Exception as e:
+            with _lock:
+                _stats["last_error"] = str(e)
+            print(f"Cache maintenance failed: {e}")
+
+
+def start_maintenance(interval: float = settings.CACHE_MAINTENANCE_INTERVAL_S) -> None:
+    global _task
+    if _task is None and interval > 0:
+        _task = asyncio.create_task(_maintenance_loop(interval))
+
+
+async def stop_maintenance() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def maintenance_stats() -> dict:
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,101 @@
+"""
+In-process LRU tier in front of the SQLite response cache
+
+Holds already-decoded cache entries so hot keys skip both the database read
+and json.loads. Values are shared between callers and must be treated as
+read-only.
+"""
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+from datetime import datetime
+
+_Entry = namedtuple("_Entry", ["value", "expires_at", "size"])
+
+MISS = object()
+
+
+def key_prefix(key: str) -> str:
+    """
+    Group cache keys for metrics: drop the leading scope segment and any
+    trailing numeric segments, so "123_schedule_4521" counts as "schedule".
+    """
+    parts = key.split("_")[1:] or [key]
+    while len(parts) > 1 and parts[-1].isdigit():
+        parts.pop()
+    return "_".join(parts)
+
+
+class MemoryCache:
+    """
+    LRU of decoded cache entries bounded by the approximate size of their
+    JSON encoding. Entries expire at the same time as their SQLite rows.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0, "evictions": 0})
+
+    def get(self, key: str):
+        """Return the cached value, or MISS"""
+        now = datetime.utcnow()
+        with self._lock:
+            counters = self._counters[key_prefix(key)]
+            entry = self._entries.get(key)
+            if entry is None:
+                counters["misses"] += 1
+                return MISS
+            if now > entry.expires_at:
+                self._remove(key)
+                counters["misses"] += 1
+                return MISS
+            self._entries.move_to_end(key)
+            counters["hits"] += 1
+            return entry.value
+
+    def set(self, key: str, value, expires_at: datetime, size: int) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_entry_bytes:
+                # One oversized payload would flush everything else
+                return
+            self._entries[key] = _Entry(value, expires_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._counters[key_prefix(evicted_key)]["evictions"] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "prefixes": {prefix: dict(counters) for prefix, counters in sorted(self._counters.items())},
+            }
@@ -0,0 +1,112 @@
+"""
+Pre-encoded response bodies for catalog endpoints
+
+/events/cars and /events/tracks only change when a sync upserts them, so the
+encoded JSON (and a gzip copy) is built once and served as raw bytes. Each
+body records the table_versions version of its table (the name) read
+before it was built; a request that reads a newer version rebuilds it.
+table_versions is shared by every process, so an upsert made by another
+worker is picked up by the next request here too.
+"""
+import gzip
+import threading
+from collections import namedtuple
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.models.events import CarDB, TrackDB
+
+CARS = "cars"
+TRACKS = "tracks"
+
+# How each body is encoded; the same as FastAPI encoding the response_model
+ADAPTERS: Dict[str, TypeAdapter] = {
+    CARS: TypeAdapter(List[CarDB]),
+    TRACKS: TypeAdapter(List[TrackDB]),
+}
+
+# Appended to the ETag of gzip-encoded bodies, which are different bytes
+GZIP_SUFFIX = "-gzip"
+
+# version: the table version read before the rows the body was built from
+EncodedBody = namedtuple("EncodedBody", ["body", "gzip_body", "version"])
+
+
+def gzip_etag(etag: str) -> str:
+    return etag[:-1] + GZIP_SUFFIX + '"'
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+class ResponseCache:
+    """
+    Encoded JSON bodies by name, each valid for one table version. Versions
+    only go up, so a body is replaced only by one built at the same or a
+    later version.
+    """
+
+    def __init__(self, gzip_min_bytes: int):
+        self.gzip_min_bytes = gzip_min_bytes
+        self._bodies: Dict[str, EncodedBody] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0}
+
+    async def get(self, name: str, version: int, load: Callable[[], Awaitable]) -> EncodedBody:
+        """
+        The encoded body for name at version, built from the models load()
+        returns on a miss. Read version before calling: rows loaded after
+        it are at least that new, and a later change bumps the version
+        past the stored body's.
+        """
+        entry = self._bodies.get(name)
+        if entry is not None and entry.version == version:
+            self._counters["hits"] += 1
+            return entry
+        self._counters["misses"] += 1
+        if entry is not None:
+            self._counters["stale"] += 1
+        body = ADAPTERS[name].dump_json(await load())
+        gzip_body = None
+        if 0 <= self.gzip_min_bytes <= len(body):
+            gzip_body = gzip.compress(body, compresslevel=6)
+        entry = EncodedBody(body, gzip_body, version)
+        with self._lock:
+            current = self._bodies.get(name)
+            if current is None or current.version <= version:
+                self._bodies[name] = entry
+        return entry
+
+    def response(self, entry: EncodedBody, request: Request, headers: Optional[dict] = None) -> Response:
+        """headers are extra response headers, such as the ETag of the identity body"""
+        headers = dict(headers or {})
+        if entry.gzip_body is None:
+            return Response(content=entry.body, media_type="application/json", headers=headers)
+        headers["Vary"] = "Accept-Encoding"
+        if not accepts_gzip(request):
+            return Response(content=entry.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = "gzip"
+        if "ETag" in headers:
+            headers["ETag"] = gzip_etag(headers["ETag"])
+        return Response(content=entry.gzip_body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "entries": {
+                name: {"version": entry.version, "bytes": len(entry.body),
+                       "gzip_bytes": len(entry.gzip_body) if entry.gzip_body is not None else None}
+                for name, entry in list(self._bodies.items())
+            },
+        }
+
+
+catalog_responses = ResponseCache(settings.RESPONSE_CACHE_GZIP_MIN_BYTES)
@@ -0,0 +1,30 @@
+"""
+Cache scopes: who a cached payload is shared with
+"""
+from enum import Enum
+from typing import Optional
+
+
+class CacheScope(str, Enum):
+    # Identical for every user (series, schedules, special events); stored once
+    GLOBAL = "global"
+    # Depends on whose token fetched it (team membership)
+    USER = "user"
+    # Shared by the members of one team
+    TEAM = "team"
+
+
+def scoped_key(key: str, scope: CacheScope, user_id=None, team_id: Optional[int] = None) -> str:
+    """
+    Build the stored cache key. The scope is always the first "_" segment:
+    "global_series", "<user_id>_teams", "team<team_id>_roster".
+    """
+    if scope == CacheScope.GLOBAL:
+        return f"global_{key}"
+    if scope == CacheScope.TEAM:
+        if team_id is None:
+            raise ValueError(f"Team-scoped cache key {key!r} needs a team_id")
+        return f"team{team_id}_{key}"
+    if user_id is None:
+        raise ValueError(f"User-scoped cache key {key!r} needs a user_id")
+    return f"{user_id}_{key}"
@@ -0,0 +1,60 @@
+"""
+How the current request's cached payload was served, for response headers
+
+cached_call records the outcome in a context variable; routes that proxy
+iRacing data pass their Response to apply_cache_headers(), and can answer
+conditional requests with cache_validators().
+"""
+from contextvars import ContextVar
+from datetime import timezone
+from enum import Enum
+from typing import Optional
+
+from fastapi import Response
+
+from app.utils.conditional import Validators
+
+
+class CacheState(str, Enum):
+    HIT = "HIT"
+    MISS = "MISS"
+    # Past the soft TTL, served while a background refresh runs
+    STALE = "STALE"
+    # Upstream failed or the hard TTL passed; served the last good value
+    STALE_IF_ERROR = "STALE-IF-ERROR"
+
+
+_state: ContextVar[Optional[CacheState]] = ContextVar("cache_state", default=None)
+_age: ContextVar[int] = ContextVar("cache_age", default=0)
+_entry: ContextVar = ContextVar("cache_entry", default=None)
+
+
+def set_cache_status(state: CacheState, age_seconds: float = 0, entry=None) -> None:
+    """entry is the CacheEntry served, if any"""
+    _state.set(state)
+    _age.set(max(int(age_seconds), 0))
+    _entry.set(entry)
+
+
+def get_cache_status() -> Optional[CacheState]:
+    return _state.get()
+
+
+def cache_validators() -> Optional[Validators]:
+    """ETag and Last-Modified of the entry served, or None"""
+    entry = _entry.get()
+    if entry is None:
+        return None
+    return Validators(entry.etag, entry.stored_at.replace(tzinfo=timezone.utc))
+
+
+def apply_cache_headers(response: Response) -> None:
+    state = _state.get()
+    if state is None:
+        return
+    response.headers["X-Cache"] = state.value
+    response.headers["Age"] = str(_age.get())
+    if state == CacheState.STALE:
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    elif state == CacheState.STALE_IF_ERROR:
+        response.headers["Warning"] = '111 - "Revalidation Failed"'
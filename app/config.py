@@ -14,6 +14,110 @@ class Settings:
     USERINFO_URL = "https://members-ng.iracing.com/data/member/info"
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecret")
     ALGORITHM = "HS256"
+    # Comma separated iRacing user ids allowed to use the /cache admin routes
+    ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+    # --- Database ---
+    DB_PATH = os.getenv("DB_PATH", "iracing.db")
+    # Apply pending schema migrations on startup; disable to run them via the CLI
+    DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+    DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", str(64 * 1024)))
+    # Group commit: writes queued within this window share one transaction
+    DB_WRITE_MAX_BATCH = int(os.getenv("DB_WRITE_MAX_BATCH", "64"))
+    DB_WRITE_MAX_DELAY_MS = float(os.getenv("DB_WRITE_MAX_DELAY_MS", "2"))
+    # NORMAL under WAL syncs the log at checkpoints, not every commit: a
+    # power loss can drop the last commits but never corrupts the database.
+    # FULL also syncs each group commit, if every write must survive.
+    DB_WRITE_SYNCHRONOUS = os.getenv("DB_WRITE_SYNCHRONOUS", "NORMAL")
+    # Threads running queries for async routes; keep <= DB_POOL_SIZE
+    DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+    # Events per page when GET /events is called without a limit
+    EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "100"))
+
+    # --- Response cache database ---
+    # Kept apart from DB_PATH so cache writes never hold the application write lock
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache.db")
+    CACHE_DB_POOL_SIZE = int(os.getenv("CACHE_DB_POOL_SIZE", "8"))
+    # Only takes effect when the cache database file is created
+    CACHE_DB_PAGE_SIZE = int(os.getenv("CACHE_DB_PAGE_SIZE", "16384"))
+    CACHE_DB_CACHE_SIZE_KB = int(os.getenv("CACHE_DB_CACHE_SIZE_KB", str(32 * 1024)))
+    # In-process tier of decoded payloads, sized by their JSON length
+    CACHE_MEMORY_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+    CACHE_MEMORY_MAX_ENTRY_BYTES = int(os.getenv("CACHE_MEMORY_MAX_ENTRY_BYTES", str(16 * 1024 * 1024)))
+    # Per-endpoint TTLs come from the API doc's expirationSeconds plus the
+    # overrides in app/iracing/policies.py; this is for paths in neither
+    IRACING_API_DOC_PATH = os.getenv("IRACING_API_DOC_PATH", "iRacing_api_doc.json")
+    CACHE_POLICY_OVERRIDES_FILE = os.getenv("CACHE_POLICY_OVERRIDES_FILE")
+    CACHE_DEFAULT_TTL_HOURS = float(os.getenv("CACHE_DEFAULT_TTL_HOURS", str(24 * 7)))
+    # How long past its hard TTL a payload is kept to serve if iRacing is down
+    CACHE_STALE_IF_ERROR_HOURS = float(os.getenv("CACHE_STALE_IF_ERROR_HOURS", str(24 * 7)))
+    # Background reaper: expired rows are deleted and least recently used
+    # rows evicted until the stored payloads fit in CACHE_MAX_BYTES
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    CACHE_MAINTENANCE_INTERVAL_S = float(os.getenv("CACHE_MAINTENANCE_INTERVAL_S", "300"))
+    CACHE_REAP_BATCH = int(os.getenv("CACHE_REAP_BATCH", "500"))
+    CACHE_VACUUM_PAGES = int(os.getenv("CACHE_VACUUM_PAGES", "1000"))
+    # Catalog bodies at least this large also keep a gzip copy; -1 disables
+    RESPONSE_CACHE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_CACHE_GZIP_MIN_BYTES", "1024"))
+
+    # --- iRacing upstream ---
+    # Failing upstream keys are not retried until their backoff runs out;
+    # the delay doubles per consecutive failure up to the max
+    UPSTREAM_BACKOFF_4XX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_4XX_SECONDS", "60"))
+    UPSTREAM_BACKOFF_4XX_MAX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_4XX_MAX_SECONDS", "3600"))
+    UPSTREAM_BACKOFF_5XX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_5XX_SECONDS", "5"))
+    UPSTREAM_BACKOFF_5XX_MAX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_5XX_MAX_SECONDS", "300"))
+    UPSTREAM_BACKOFF_429_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_429_SECONDS", "30"))
+    UPSTREAM_BACKOFF_429_MAX_SECONDS = float(os.getenv("UPSTREAM_BACKOFF_429_MAX_SECONDS", "600"))
+    # Pooled keep-alive clients, one per host (API, signed links, OAuth).
+    # HTTP/2 needs the h2 package (pip install httpx[http2]).
+    IRACING_HTTP2 = os.getenv("IRACING_HTTP2", "false").lower() == "true"
+    IRACING_HTTP_MAX_CONNECTIONS = int(os.getenv("IRACING_HTTP_MAX_CONNECTIONS", "32"))
+    IRACING_HTTP_MAX_KEEPALIVE = int(os.getenv("IRACING_HTTP_MAX_KEEPALIVE", "16"))
+    IRACING_HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("IRACING_HTTP_KEEPALIVE_EXPIRY_S", "60"))
+    IRACING_HTTP_CONNECT_TIMEOUT_S = float(os.getenv("IRACING_HTTP_CONNECT_TIMEOUT_S", "5"))
+    IRACING_HTTP_READ_TIMEOUT_S = float(os.getenv("IRACING_HTTP_READ_TIMEOUT_S", "30"))
+    # How long a request waits for a free connection when the pool is full
+    IRACING_HTTP_POOL_TIMEOUT_S = float(os.getenv("IRACING_HTTP_POOL_TIMEOUT_S", "10"))
+    # Streamed signed-link downloads stay in memory up to this size, then spill to a temp file
+    IRACING_SPOOL_MAX_MEMORY_BYTES = int(os.getenv("IRACING_SPOOL_MAX_MEMORY_BYTES", str(1024 * 1024)))
+    IRACING_STREAM_CHUNK_BYTES = int(os.getenv("IRACING_STREAM_CHUNK_BYTES", str(64 * 1024)))
+    # Array elements decoded per worker-thread hop when a spooled payload is iterated from async code
+    IRACING_STREAM_BATCH_ITEMS = int(os.getenv("IRACING_STREAM_BATCH_ITEMS", "500"))
+    # Chunk files of a chunked result (results/search_series, lap_data, ...) downloaded at once
+    IRACING_CHUNK_CONCURRENCY = int(os.getenv("IRACING_CHUNK_CONCURRENCY", "6"))
+    # Data API quota; replaced by the x-ratelimit-* headers once iRacing sends them.
+    # Background calls (sync, warm-up) leave the last RESERVE requests of a window
+    # to user requests.
+    IRACING_RATE_LIMIT = int(os.getenv("IRACING_RATE_LIMIT", "240"))
+    IRACING_RATE_LIMIT_WINDOW_S = float(os.getenv("IRACING_RATE_LIMIT_WINDOW_S", "60"))
+    IRACING_RATE_LIMIT_BURST = int(os.getenv("IRACING_RATE_LIMIT_BURST", "10"))
+    IRACING_RATE_LIMIT_RESERVE = int(os.getenv("IRACING_RATE_LIMIT_RESERVE", "20"))
+    # Transient failures (5xx, connection errors, 429 on the API) are retried
+    # with jittered exponential backoff; a call never retries past the budget
+    IRACING_RETRY_API_ATTEMPTS = int(os.getenv("IRACING_RETRY_API_ATTEMPTS", "3"))
+    IRACING_RETRY_LINK_ATTEMPTS = int(os.getenv("IRACING_RETRY_LINK_ATTEMPTS", "3"))
+    IRACING_RETRY_BASE_SECONDS = float(os.getenv("IRACING_RETRY_BASE_SECONDS", "0.25"))
+    IRACING_RETRY_MAX_SECONDS = float(os.getenv("IRACING_RETRY_MAX_SECONDS", "4"))
+    IRACING_RETRY_BUDGET_SECONDS = float(os.getenv("IRACING_RETRY_BUDGET_SECONDS", "15"))
+    # Per-host breaker: opens after this many consecutive failures, fails fast while open
+    IRACING_BREAKER_FAILURES = int(os.getenv("IRACING_BREAKER_FAILURES", "5"))
+    IRACING_BREAKER_OPEN_SECONDS = float(os.getenv("IRACING_BREAKER_OPEN_SECONDS", "30"))
+
+    # --- Cache warm-up ---
+    # Prefetched at startup and then every WARMUP_INTERVAL_S (0: startup only)
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_TARGETS = {target.strip() for target in os.getenv(
+        "WARMUP_TARGETS", "catalog,series,special_events,schedules").split(",") if target.strip()}
+    # iRacing user whose stored OAuth token fetches the upstream targets;
+    # without one only the local catalog is warmed
+    WARMUP_USER_ID = int(os.getenv("WARMUP_USER_ID")) if os.getenv("WARMUP_USER_ID") else None
+    WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+    WARMUP_INTERVAL_S = float(os.getenv("WARMUP_INTERVAL_S", "1800"))
 
 
 settings = Settings()
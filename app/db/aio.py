@@ -0,0 +1,90 @@
+"""
+Awaitable versions of the database query functions, for use in async routes
+"""
+import functools
+
+from app.cache import cache
+from app.cache.memory import MISS
+from app.db import driver_roster_queries, events_queries, queries, race_plan_queries
+from app.db.executor import run_db
+
+
+def awaitable(fn):
+    """Wrap a blocking query function so it runs on the database executor"""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await run_db(fn, *args, **kwargs)
+    return wrapper
+
+
+# ===== CACHE / USERS =====
+
+async def get_cache_entry(key: str):
+    # Memory-tier hits are answered inline, without an executor hop
+    entry = cache.get_memory_cache(key)
+    if entry is not MISS:
+        return entry
+    return await run_db(cache.get_persisted_cache_entry, key)
+
+
+async def get_cache(key: str):
+    entry = await get_cache_entry(key)
+    return entry.value if entry is not None else None
+
+
+set_cache = awaitable(cache.set_cache)
+invalidate_cache_tags = awaitable(cache.invalidate_tags)
+invalidate_cache_prefix = awaitable(cache.invalidate_prefix)
+save_iracing_token = awaitable(cache.save_iracing_token)
+get_display_name_from_user_id = awaitable(queries.get_display_name_from_user_id)
+get_iracing_token_for_user = queries.get_iracing_token_for_user
+get_table_versions = awaitable(queries.get_table_versions)
+
+# ===== CARS / TRACKS =====
+
+upsert_cars = awaitable(events_queries.upsert_cars)
+get_all_cars = awaitable(events_queries.get_all_cars)
+get_car_by_id = awaitable(events_queries.get_car_by_id)
+upsert_tracks = awaitable(events_queries.upsert_tracks)
+get_all_tracks = awaitable(events_queries.get_all_tracks)
+get_track_by_id = awaitable(events_queries.get_track_by_id)
+
+# ===== EVENTS =====
+
+create_event = awaitable(events_queries.create_event)
+get_event_by_id = awaitable(events_queries.get_event_by_id)
+get_all_events = awaitable(events_queries.get_all_events)
+update_event = awaitable(events_queries.update_event)
+delete_event = awaitable(events_queries.delete_event)
+
+# ===== TEAMS =====
+
+upsert_teams = awaitable(events_queries.upsert_teams)
+get_all_teams = awaitable(events_queries.get_all_teams)
+get_team_by_id = awaitable(events_queries.get_team_by_id)
+get_team_by_team_id = awaitable(events_queries.get_team_by_team_id)
+
+# ===== EVENT REGISTRATIONS =====
+
+register_for_event = awaitable(events_queries.register_for_event)
+get_registration_by_id = awaitable(events_queries.get_registration_by_id)
+get_registrations_for_user = awaitable(events_queries.get_registrations_for_user)
+get_registrations_for_event = awaitable(events_queries.get_registrations_for_event)
+get_registrations_for_event_and_team = awaitable(events_queries.get_registrations_for_event_and_team)
+get_event_registration_for_event_and_team = awaitable(events_queries.get_event_registration_for_event_and_team)
+cancel_registration = awaitable(events_queries.cancel_registration)
+cancel_user_event_registration = awaitable(events_queries.cancel_user_event_registration)
+
+# ===== RACE PLANS =====
+
+create_race_plan = awaitable(race_plan_queries.create_race_plan)
+get_race_plan_by_team_and_event = awaitable(race_plan_queries.get_race_plan_by_team_and_event)
+
+# ===== DRIVER ROSTERS =====
+
+list_driver_roster_by_race_plan = awaitable(driver_roster_queries.list_driver_roster_by_race_plan)
+create_driver_roster_entry = awaitable(driver_roster_queries.create_driver_roster_entry)
+update_driver_roster_entry = awaitable(driver_roster_queries.update_driver_roster_entry)
+delete_driver_roster_entry = awaitable(driver_roster_queries.delete_driver_roster_entry)
+create_driver_roster_entry_from_event_registration = awaitable(
+    driver_roster_queries.create_driver_roster_entry_from_event_registration)
@@ -0,0 +1,72 @@
+"""
+Bounded thread pool for running blocking sqlite work off the event loop
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "max_queued": 0,
+    "submitted": 0,
+    "completed": 0,
+    "failed": 0,
+    "queue_wait_total": 0.0,
+    "queue_wait_max": 0.0,
+}
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking query function on the database executor and await it"""
+    submitted_at = time.perf_counter()
+    with _lock:
+        _stats["submitted"] += 1
+        _stats["queued"] += 1
+        _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+
+    def call():
+        waited = time.perf_counter() - submitted_at
+        with _lock:
+            _stats["queued"] -= 1
+            _stats["running"] += 1
+            _stats["queue_wait_total"] += waited
+            _stats["queue_wait_max"] = max(_stats["queue_wait_max"], waited)
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with _lock:
+                _stats["running"] -= 1
+                _stats["completed" if ok else "failed"] += 1
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, call)
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=True)
+
+
+def executor_stats() -> dict:
+    with _lock:
+        started = _stats["submitted"] - _stats["queued"]
+        return {
+            "workers": settings.DB_EXECUTOR_WORKERS,
+            "queue_depth": _stats["queued"],
+            "running": _stats["running"],
+            "max_queue_depth": _stats["max_queued"],
+            "submitted": _stats["submitted"],
+            "completed": _stats["completed"],
+            "failed": _stats["failed"],
+            "queue_wait_avg_ms": round(_stats["queue_wait_total"] * 1000 / started, 3) if started else 0.0,
+            "queue_wait_max_ms": round(_stats["queue_wait_max"] * 1000, 3),
+        }
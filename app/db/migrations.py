@@ -0,0 +1,598 @@
+"""
+Versioned schema migrations, tracked with PRAGMA user_version
+
+Each migration runs once, in order, inside its own transaction. A database
+that is already at the latest version costs a single PRAGMA read at startup.
+The application database and the response cache database are versioned
+independently.
+
+    python -m app.db.migrations migrate   # apply pending migrations
+    python -m app.db.migrations check     # exit 1 if migrations are pending
+    python -m app.db.migrations dry-run   # apply pending migrations, then roll back
+
+Pass --cache to run the same commands against the cache database.
+"""
+import argparse
+import sys
+from collections import namedtuple
+from typing import List
+
+from app.cache.db import APP_PRAGMAS, CACHE_DB_PATH, CACHE_PRAGMAS, DB_PATH, open_connection
+
+# transactional=False is for statements SQLite refuses inside a transaction
+# (VACUUM); those migrations must be safe to re-run and are skipped by dry-run.
+# dry_run replaces apply during a dry run, for migrations that write outside
+# the database being migrated (which a rollback would not undo); it should
+# only report what apply would do.
+Migration = namedtuple("Migration", ["version", "description", "apply", "transactional", "dry_run"],
+                       defaults=(True, None))
+
+# Pragmas stored in the database file itself. check and dry-run open the
+# file without them, so inspecting a database never converts it (to WAL,
+# a new page size, incremental auto-vacuum).
+_PERSISTENT_PRAGMAS = {"journal_mode", "page_size", "auto_vacuum"}
+
+
+def _session_pragmas(pragmas: dict) -> dict:
+    return {name: value for name, value in pragmas.items() if name not in _PERSISTENT_PRAGMAS}
+
+
+def _add_column_if_missing(db, table: str, column: str, definition: str) -> None:
+    columns = {row[1] for row in db.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column not in columns:
+        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+# ===== MIGRATIONS =====
+
+def _0001_baseline(db):
+    """Tables previously created by the init_*_db functions"""
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS cache(
+        key TEXT PRIMARY KEY,
+        VALUE TEXT,
+        expires_at TEXT
+    )
+    """)
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        display_name TEXT,
+        iracing_access_token TEXT,
+        iracing_refresh_token TEXT,
+        token_expires INTEGER
+    )
+    """)
+
+    # Cars table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS cars (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        car_id INTEGER UNIQUE NOT NULL,
+        car_name TEXT NOT NULL,
+        logo TEXT,
+        tank_size REAL,
+        content_hash TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Tracks table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS tracks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        track_id INTEGER UNIQUE NOT NULL,
+        track_name TEXT NOT NULL,
+        category TEXT,
+        config_name TEXT,
+        logo TEXT,
+        pit_road_speed_limit INTEGER,
+        small_image TEXT,
+        content_hash TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Events table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_name TEXT NOT NULL,
+        event_description TEXT,
+        start_date DATE NOT NULL,
+        end_date DATE NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        track_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (track_id) REFERENCES tracks(id)
+    )
+    """)
+
+    # Time slots table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS event_time_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        slot_time DATETIME NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Junction table for many-to-many relationship between events and cars
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS event_cars (
+        event_id INTEGER NOT NULL,
+        car_id INTEGER NOT NULL,
+        PRIMARY KEY (event_id, car_id),
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+        FOREIGN KEY (car_id) REFERENCES cars(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Teams table
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS teams (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        team_id INTEGER UNIQUE NOT NULL,
+        team_name TEXT NOT NULL,
+        owner INTEGER NOT NULL,
+        admin INTEGER NOT NULL,
+        team_logo TEXT,
+        content_hash TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Event registrations table - stores user registrations for events
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS event_registrations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        time_slot DATETIME NOT NULL,
+        car_id INTEGER NOT NULL,
+        registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (event_id, user_id, team_id),
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+        FOREIGN KEY (team_id) REFERENCES teams(id) ON DELETE CASCADE,
+        FOREIGN KEY (time_slot) REFERENCES event_time_slots(slot_time) ON DELETE CASCADE,
+        FOREIGN KEY (car_id) REFERENCES cars(id) ON DELETE CASCADE
+    )
+    """)
+
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS race_plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        team_id INTEGER NOT NULL,
+        car_id INTEGER NOT NULL,
+        event_id INTEGER NOT NULL,
+        time_slot TEXT NOT NULL,
+
+        FOREIGN KEY (team_id) REFERENCES teams(id) ON DELETE CASCADE,
+        FOREIGN KEY (car_id) REFERENCES cars(id) ON DELETE CASCADE,
+        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+    )
+    """)
+
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS driver_rosters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        color TEXT,
+        name TEXT,
+        stints INTEGER,
+        fair_share BOOLEAN,
+        gmt_offset INTEGER,
+        i_rating REAL,
+        lap_time REAL,
+        factor INTEGER,
+        preference TEXT,
+        race_plan_id INTEGER NOT NULL,
+        user_id INTEGER,
+
+        FOREIGN KEY (race_plan_id) REFERENCES race_plans(id) ON DELETE CASCADE
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Columns added after the tables were first created
+    for table in ("cars", "tracks", "teams"):
+        _add_column_if_missing(db, table, "content_hash", "TEXT")
+
+
+def _0002_hot_query_indexes(db):
+    """Indexes for the lookups and sorts in app/db/*_queries.py"""
+    # Registration lists read every column and sort by registered_at. Each
+    # index matches one filter (event, event and team, user), then the sort
+    # order, then the remaining columns, so the lists are answered from the
+    # index alone and without a sort.
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_event_registrations_event
+    ON event_registrations (event_id, registered_at, user_id, team_id, time_slot, car_id)
+    """)
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_event_registrations_event_team
+    ON event_registrations (event_id, team_id, registered_at, user_id, time_slot, car_id)
+    """)
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_event_registrations_user
+    ON event_registrations (user_id, registered_at, event_id, team_id, time_slot, car_id)
+    """)
+    # Covers the bulk time slot load and the registration slot check
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_event_time_slots_event_slot
+    ON event_time_slots (event_id, slot_time)
+    """)
+    # Event listing order and keyset pagination on (start_date, id)
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_events_start_date
+    ON events (start_date)
+    """)
+    # Covering: the race plan lookup reads only these columns
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_race_plans_team_event
+    ON race_plans (team_id, event_id, car_id, time_slot)
+    """)
+    db.execute("""
+    CREATE INDEX IF NOT EXISTS idx_driver_rosters_race_plan
+    ON driver_rosters (race_plan_id)
+    """)
+    # Catalog listings sorted by name; the cars listing is covered
+    db.execute("CREATE INDEX IF NOT EXISTS idx_cars_car_name ON cars (car_name, car_id, logo, tank_size)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_tracks_track_name ON tracks (track_name)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_teams_team_name ON teams (team_name)")
+
+
+def _0003_move_cache_to_cache_db(db):
+    """Copy cached responses into the cache database and drop the table here"""
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache'").fetchone()
+    if not exists:
+        return
+
+    rows = db.execute("SELECT key, value, expires_at FROM cache")
+    batch = rows.fetchmany(500)
+    if batch:
+        # The copy commits on its own connection before the DROP below does.
+        # If this migration is rolled back the copy is simply repeated, and
+        # entries already written to the cache database are kept.
+        migrate_cache()
+        cache_db = open_connection(CACHE_DB_PATH, CACHE_PRAGMAS)
+        try:
+            while batch:
+                cache_db.executemany(
+                    "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    [tuple(row) for row in batch])
+                batch = rows.fetchmany(500)
+            cache_db.commit()
+        finally:
+            cache_db.close()
+
+    db.execute("DROP TABLE cache")
+
+
+def _0003_dry_run(db):
+    """Count the rows 0003 would copy, without touching the cache database"""
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache'").fetchone()
+    rows = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] if exists else 0
+    print(f"  would copy {rows} cached responses to {CACHE_DB_PATH}")
+    # Rolled back with the rest, so later migrations see the schema 0003 leaves
+    if exists:
+        db.execute("DROP TABLE cache")
+
+
+def _0004_table_versions(db):
+    """Per-table change counters, the source of the read routes' ETags"""
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS table_versions(
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+    """)
+    # Triggers rather than updated_at maxima: those miss deletes, child
+    # tables without updated_at, and two changes within the same second
+    tables = ("cars", "tracks", "events", "event_time_slots", "event_cars", "teams",
+              "event_registrations", "race_plans", "driver_rosters", "users")
+    for table in tables:
+        db.execute("INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,))
+        # Token refreshes rewrite users constantly; only names are ever served
+        update = "UPDATE OF display_name" if table == "users" else "UPDATE"
+        for event in ("INSERT", update, "DELETE"):
+            db.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.split()[0].lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP
+                WHERE name = '{table}';
+            END
+            """)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Baseline schema", _0001_baseline),
+    Migration(2, "Indexes for hot queries", _0002_hot_query_indexes),
+    Migration(3, "Move the response cache to its own database", _0003_move_cache_to_cache_db,
+              dry_run=_0003_dry_run),
+    Migration(4, "Table change versions", _0004_table_versions),
+]
+
+
+# ===== CACHE DATABASE MIGRATIONS =====
+
+def _cache_0001_cache_table(db):
+    """Response cache table, formerly in the application database"""
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS cache(
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        expires_at TEXT
+    )
+    """)
+
+
+def _cache_0002_eviction_columns(db):
+    """Access and size tracking for the reaper and LRU eviction"""
+    _add_column_if_missing(db, "cache", "last_access", "INTEGER")
+    _add_column_if_missing(db, "cache", "size", "INTEGER")
+    db.execute("""
+    UPDATE cache
+    SET last_access = COALESCE(last_access, CAST(strftime('%s', 'now') AS INTEGER)),
+        size = COALESCE(size, length(value))
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache (expires_at)")
+    db.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access)")
+
+
+def _cache_0003_incremental_vacuum(db):
+    """Let the reaper hand freed pages back with PRAGMA incremental_vacuum"""
+    # 2 = INCREMENTAL. New files get it from CACHE_PRAGMAS; existing ones
+    # only switch over after a full VACUUM.
+    if db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        db.execute("VACUUM")
+
+
+def _cache_0004_global_iracing_data(db):
+    """Collapse per-user copies of global iRacing payloads into one shared entry"""
+    per_user_global = """
+        (key GLOB '[0-9]*_series' OR key GLOB '[0-9]*_schedule_*' OR key GLOB '[0-9]*_special_events')
+    """
+    # Keep the copy that expires last
+    db.execute(f"""
+    INSERT OR IGNORE INTO cache (key, value, expires_at, last_access, size)
+    SELECT 'global_' || substr(key, instr(key, '_') + 1), value, MAX(expires_at), last_access, size
+    FROM cache
+    WHERE {per_user_global}
+    GROUP BY substr(key, instr(key, '_') + 1)
+    """)
+    db.execute(f"DELETE FROM cache WHERE {per_user_global}")
+
+
+def _cache_0005_stored_at(db):
+    """When each payload was fetched, for soft/hard TTL decisions"""
+    _add_column_if_missing(db, "cache", "stored_at", "TEXT")
+    # Every existing row was written with cached_call's 7 day TTL
+    db.execute("""
+    UPDATE cache
+    SET stored_at = strftime('%Y-%m-%dT%H:%M:%f', expires_at, '-7 days')
+    WHERE stored_at IS NULL
+    """)
+
+
+def _cache_0006_tags(db):
+    """Tags (user, season, team, endpoint) for bulk invalidation"""
+    db.execute("""
+    CREATE TABLE IF NOT EXISTS cache_tags(
+        tag TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (tag, key)
+    ) WITHOUT ROWID
+    """)
+    db.execute("CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags (key)")
+    # Covers the reaper and eviction as well as explicit deletes
+    db.execute("""
+    CREATE TRIGGER IF NOT EXISTS cache_delete_tags AFTER DELETE ON cache
+    BEGIN
+        DELETE FROM cache_tags WHERE key = old.key;
+    END
+    """)
+    # Existing rows get the tags their key reveals; endpoint tags are
+    # added as rows are refreshed
+    db.execute("""
+    INSERT OR IGNORE INTO cache_tags (tag, key)
+    SELECT 'user:' || substr(key, 1, instr(key, '_') - 1), key
+    FROM cache WHERE key GLOB '[0-9]*_*'
+    """)
+    db.execute("""
+    INSERT OR IGNORE INTO cache_tags (tag, key)
+    SELECT 'season:' || substr(key, length('global_schedule_') + 1), key
+    FROM cache WHERE key GLOB 'global_schedule_[0-9]*'
+    """)
+
+
+def _cache_0007_normalize_copied_rows(db):
+    """Shared keys, tracking columns and tags for rows app migration 0003 copies in"""
+    # 0003 runs after the cache database is migrated and copies bare
+    # (key, value, expires_at) rows, so the backfills of 0002, 0004, 0005
+    # and 0006 never saw them. This trigger applies them per copied row;
+    # rows written by set_cache always have stored_at and are left alone.
+    per_user_global = """
+        (NEW.key GLOB '[0-9]*_series' OR NEW.key GLOB '[0-9]*_schedule_*' OR NEW.key GLOB '[0-9]*_special_events')
+    """
+    db.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS cache_normalize_copied AFTER INSERT ON cache
+    WHEN NEW.stored_at IS NULL
+    BEGIN
+        -- Every copied row was written with cached_call's 7 day TTL
+        UPDATE cache
+        SET stored_at = strftime('%Y-%m-%dT%H:%M:%f', expires_at, '-7 days'),
+            last_access = COALESCE(last_access, CAST(strftime('%s', 'now') AS INTEGER)),
+            size = COALESCE(size, length(value))
+        WHERE key = NEW.key;
+
+        -- Per-user copies of global payloads collapse into the shared
+        -- entry, keeping whichever expires last
+        INSERT INTO cache (key, value, expires_at, last_access, size, stored_at)
+        SELECT 'global_' || substr(key, instr(key, '_') + 1), value, expires_at, last_access, size, stored_at
+        FROM cache
+        WHERE key = NEW.key AND {per_user_global}
+        ON CONFLICT (key) DO UPDATE SET
+            value = excluded.value, expires_at = excluded.expires_at,
+            size = excluded.size, stored_at = excluded.stored_at
+        WHERE excluded.expires_at > cache.expires_at;
+        DELETE FROM cache WHERE key = NEW.key AND {per_user_global};
+
+        INSERT OR IGNORE INTO cache_tags (tag, key)
+        SELECT 'user:' || substr(NEW.key, 1, instr(NEW.key, '_') - 1), NEW.key
+        WHERE NEW.key GLOB '[0-9]*_*' AND NOT {per_user_global};
+        INSERT OR IGNORE INTO cache_tags (tag, key)
+        SELECT 'season:' || substr(NEW.key, instr(NEW.key, '_schedule_') + length('_schedule_')),
+               'global_' || substr(NEW.key, instr(NEW.key, '_') + 1)
+        WHERE NEW.key GLOB '[0-9]*_schedule_[0-9]*';
+    END
+    """)
+    # Rows already copied in before this migration go through the trigger
+    # too: those missing stored_at, per-user global keys, and user keys
+    # without their user tag
+    db.execute("""
+    CREATE TEMP TABLE copied_rows AS
+    SELECT key, value, expires_at FROM cache
+    WHERE stored_at IS NULL
+       OR key GLOB '[0-9]*_series' OR key GLOB '[0-9]*_schedule_*' OR key GLOB '[0-9]*_special_events'
+       OR (key GLOB '[0-9]*_*' AND key NOT IN (SELECT key FROM cache_tags WHERE tag GLOB 'user:*'))
+    """)
+    db.execute("DELETE FROM cache WHERE key IN (SELECT key FROM copied_rows)")
+    db.execute("INSERT INTO cache (key, value, expires_at) SELECT key, value, expires_at FROM copied_rows")
+    db.execute("DROP TABLE copied_rows")
+
+
+CACHE_MIGRATIONS: List[Migration] = [
+    Migration(1, "Cache table", _cache_0001_cache_table),
+    Migration(2, "Cache eviction columns and indexes", _cache_0002_eviction_columns),
+    Migration(3, "Incremental auto-vacuum", _cache_0003_incremental_vacuum, transactional=False),
+    Migration(4, "Share global iRacing data across users", _cache_0004_global_iracing_data),
+    Migration(5, "Cache entry fetch time", _cache_0005_stored_at),
+    Migration(6, "Cache tags", _cache_0006_tags),
+    Migration(7, "Normalize rows copied from the application database", _cache_0007_normalize_copied_rows),
+]
+
+
+# ===== RUNNER =====
+
+def current_version(db) -> int:
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version(migrations: List[Migration] = MIGRATIONS) -> int:
+    return migrations[-1].version if migrations else 0
+
+
+def pending_migrations(db, migrations: List[Migration] = MIGRATIONS) -> List[Migration]:
+    version = current_version(db)
+    return [migration for migration in migrations if migration.version > version]
+
+
+def _apply(db, migration: Migration) -> bool:
+    """Apply one migration in its own transaction; False if another process got there first"""
+    if not migration.transactional:
+        if current_version(db) >= migration.version:
+            return False
+        migration.apply(db)
+        db.execute(f"PRAGMA user_version = {migration.version}")
+        return True
+
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-check under the write lock in case another worker migrated meanwhile
+        if current_version(db) >= migration.version:
+            db.execute("ROLLBACK")
+            return False
+        migration.apply(db)
+        db.execute(f"PRAGMA user_version = {migration.version}")
+        db.execute("COMMIT")
+        return True
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+def _dry_run(db, migrations: List[Migration]) -> List[Migration]:
+    """Apply every pending migration in one transaction, then roll it back"""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        pending = [migration for migration in pending_migrations(db, migrations) if migration.transactional]
+        for migration in pending:
+            (migration.dry_run or migration.apply)(db)
+            db.execute(f"PRAGMA user_version = {migration.version}")
+        return pending
+    finally:
+        db.execute("ROLLBACK")
+
+
+def migrate(db_path: str = DB_PATH, dry_run: bool = False,
+            migrations: List[Migration] = MIGRATIONS, pragmas: dict = APP_PRAGMAS) -> List[Migration]:
+    """Apply pending migrations and return the ones that ran"""
+    db = open_connection(db_path, _session_pragmas(pragmas) if dry_run else pragmas)
+    db.isolation_level = None
+    try:
+        if dry_run:
+            return _dry_run(db, migrations)
+
+        applied = []
+        for migration in pending_migrations(db, migrations):
+            if _apply(db, migration):
+                applied.append(migration)
+        return applied
+    finally:
+        db.close()
+
+
+def migrate_cache(db_path: str = CACHE_DB_PATH, dry_run: bool = False) -> List[Migration]:
+    return migrate(db_path, dry_run, CACHE_MIGRATIONS, CACHE_PRAGMAS)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    parser.add_argument("command", choices=["migrate", "check", "dry-run"])
+    parser.add_argument("--cache", action="store_true", help="migrate the response cache database")
+    parser.add_argument("--db", help=f"database file (default: {DB_PATH}, or {CACHE_DB_PATH} with --cache)")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        migrations, pragmas, db_path = CACHE_MIGRATIONS, CACHE_PRAGMAS, args.db or CACHE_DB_PATH
+    else:
+        migrations, pragmas, db_path = MIGRATIONS, APP_PRAGMAS, args.db or DB_PATH
+
+    db = open_connection(db_path, _session_pragmas(pragmas))
+    try:
+        version = current_version(db)
+        pending = pending_migrations(db, migrations)
+    finally:
+        db.close()
+
+    print(f"{db_path}: schema version {version}, latest {latest_version(migrations)}")
+    for migration in pending:
+        print(f"  pending {migration.version:04d} {migration.description}")
+
+    if args.command == "check":
+        return 1 if pending else 0
+
+    if args.command == "dry-run":
+        for migration in migrate(db_path, True, migrations, pragmas):
+            print(f"  ok      {migration.version:04d} {migration.description} (rolled back)")
+        return 0
+
+    for migration in migrate(db_path, False, migrations, pragmas):
+        print(f"  applied {migration.version:04d} {migration.description}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,38 @@
 import sqlite3
 import time
-from app.cache.db import get_db
+from app.cache.db import get_db, run_write
+from app.db.executor import run_db
 from app.iracing.oauth import refresh_iracing_token
 import datetime
 
+USER_TOKENS = """
+    SELECT iracing_access_token, iracing_refresh_token, token_expires
+    FROM users WHERE user_id = ?
+"""
+TABLE_VERSIONS = "SELECT name, version, changed_at FROM table_versions WHERE name IN ({ids})"
 
-async def get_iracing_token_for_user(user_id: int) -> str:
-    db = get_db()
 
-    row = db.execute(
-        "SELECT iracing_access_token, iracing_refresh_token, token_expires "
-        "FROM users WHERE user_id = ?",
-        (user_id,)
-    ).fetchone()
+def get_user_tokens(user_id: int):
+    with get_db() as db:
+        return db.execute(USER_TOKENS, (user_id,)).fetchone()
+
+
+def update_user_tokens(user_id: int, access: str, refresh: str, expires: int):
+    def write(db):
+        db.execute(
+            """
+            UPDATE users
+            SET iracing_access_token = ?, iracing_refresh_token = ?, token_expires = ?
+            WHERE user_id = ?
+            """,
+            (access, refresh, expires, user_id)
+        )
+
+    run_write(write)
+
+
+async def get_iracing_token_for_user(user_id: int) -> str:
+    row = await run_db(get_user_tokens, user_id)
 
     if not row:
         raise Exception("User not found in database")
@@ -37,25 +57,22 @@ async def get_iracing_token_for_user(user_id: int) -> str:
     new_expires = int(time.time() + new_token_data["expires_in"])
 
     # Save updated tokens
-    db.execute(
-        """
-        UPDATE users
-        SET iracing_access_token = ?, iracing_refresh_token = ?, token_expires = ?
-        WHERE user_id = ?
-        """,
-        (new_access, new_refresh, new_expires, user_id)
-    )
-    db.commit()
+    await run_db(update_user_tokens, user_id, new_access, new_refresh, new_expires)
 
     return new_access
 
 def get_display_name_from_user_id(user_id: int) -> str:
-    db = get_db()
-
-    row = db.execute("""
-        SELECT display_name FROM users WHERE user_id = ?
-    """, (user_id,)).fetchone()
+    with get_db() as db:
+        row = db.execute("""
+            SELECT display_name FROM users WHERE user_id = ?
+        """, (user_id,)).fetchone()
 
     if not row:
         return None
-    return row[0]
\ No newline at end of file
+    return row[0]
+
+def get_table_versions(tables) -> list:
+    """(name, version, changed_at) for each of tables, bumped by triggers on every change"""
+    tables = sorted(set(tables))
+    with get_db() as db:
+        return db.execute(TABLE_VERSIONS.format(ids=", ".join("?" for _ in tables)), tables).fetchall()
@@ -0,0 +1,181 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot queries in app/db/*_queries.py
+
+Builds scratch databases at the latest migration and fails if any query
+falls back to a full SCAN of a table that grows with user data, sorts
+through a temporary b-tree, or reads table rows where it is meant to be
+answered from a covering index. The SQL comes from the query modules'
+own constants, so the checks follow the statements that actually run.
+tests/test_query_plans.py runs the same checks.
+
+    python -m app.db.query_plans
+"""
+import os
+import re
+import sys
+import tempfile
+from collections import namedtuple
+from typing import List
+
+from app.cache.cache import (
+    CACHE_ENTRY_SELECT, PREFIX_INVALIDATION, TAG_INVALIDATION, TAG_KEYS_SELECT, TAGS_DELETE_FOR_KEY,
+)
+from app.cache.db import APP_PRAGMAS, CACHE_PRAGMAS, open_connection
+from app.cache.maintenance import LEAST_RECENTLY_USED, REAP_EXPIRED_BATCH
+from app.db import events_queries as eq
+from app.db.driver_roster_queries import DRIVER_ROSTER_BY_RACE_PLAN
+from app.db.migrations import migrate, migrate_cache
+from app.db.queries import TABLE_VERSIONS, USER_TOKENS
+from app.db.race_plan_queries import RACE_PLAN_BY_TEAM_AND_EVENT
+
+# Tables whose size follows the number of users, events and registrations.
+# cars and tracks are fixed-size iRacing catalogs and may be scanned.
+GROWING_TABLES = {
+    "users", "cache", "cache_tags", "teams", "events", "event_time_slots", "event_cars",
+    "event_registrations", "race_plans", "driver_rosters",
+}
+
+# allow_scan: growing tables the query may SCAN (it walks an index in order
+# and stops at LIMIT). covering: every table lookup must be answered from an
+# index alone (or the rowid), without reading table rows.
+PlanCheck = namedtuple("PlanCheck", ["name", "sql", "params", "allow_scan", "covering"])
+PlanCheck.__new__.__defaults__ = ((), False)
+
+_IN3 = "?, ?, ?"
+
+HOT_QUERIES: List[PlanCheck] = [
+    # ----- events -----
+    PlanCheck("event by id", eq.EVENT_BY_ID, (1,)),
+    # The first page walks the start_date index and stops at LIMIT
+    PlanCheck("event listing first page", eq.event_list_sql(limit=True), (50,), ("events",)),
+    PlanCheck("event listing next page", eq.event_list_sql(after=True, limit=True), (1, 50)),
+    PlanCheck("event listing by date range", eq.event_list_sql(start_date=True, end_date=True, limit=True),
+              ("2026-01-01", "2026-12-31", 50)),
+    PlanCheck("events bulk load", eq.EVENTS_BY_IDS.format(ids=_IN3), (1, 2, 3)),
+    PlanCheck("event cars bulk load", eq.EVENT_CARS_FOR_EVENTS.format(ids=_IN3), (1, 2, 3)),
+    PlanCheck("event time slots bulk load", eq.EVENT_TIME_SLOTS_FOR_EVENTS.format(ids=_IN3), (1, 2, 3)),
+    PlanCheck("event time slot check", eq.EVENT_TIME_SLOT_CHECK, ("2026-01-01T10:00:00", 1)),
+    PlanCheck("event car check", eq.EVENT_CAR_CHECK, (1, 1)),
+    PlanCheck("event time slots delete", eq.EVENT_TIME_SLOTS_DELETE, (1,)),
+    PlanCheck("event cars delete", eq.EVENT_CARS_DELETE, (1,)),
+
+    # ----- registrations -----
+    PlanCheck("registrations for user", eq.REGISTRATIONS_FOR_USER, (1,), covering=True),
+    PlanCheck("registrations for event", eq.REGISTRATIONS_FOR_EVENT, (1,), covering=True),
+    PlanCheck("registrations for event and team", eq.REGISTRATIONS_FOR_EVENT_AND_TEAM, (1, 1), covering=True),
+    PlanCheck("registration rows for event and team", eq.REGISTRATION_ROWS_FOR_EVENT_AND_TEAM, (1, 1),
+              covering=True),
+    PlanCheck("cancel user event registration", eq.CANCEL_USER_EVENT_REGISTRATION, (1, 1)),
+
+    # ----- batch loader -----
+    PlanCheck("teams bulk load", eq.TEAMS_BY_TEAM_IDS.format(ids=_IN3), (1, 2, 3)),
+    PlanCheck("cars bulk load", eq.CARS_BY_IDS.format(ids=_IN3), (1, 2, 3)),
+    PlanCheck("users bulk load", eq.DISPLAY_NAMES_BY_USER_IDS.format(ids=_IN3), (1, 2, 3)),
+
+    # ----- catalogs -----
+    PlanCheck("cars listing", eq.CARS_LISTING, (), covering=True),
+    PlanCheck("tracks listing", eq.TRACKS_LISTING, ()),
+    PlanCheck("team by iRacing id", eq.TEAM_BY_TEAM_ID, (1,)),
+
+    # ----- race plans / rosters -----
+    PlanCheck("race plan by team and event", RACE_PLAN_BY_TEAM_AND_EVENT, (1, 1), covering=True),
+    PlanCheck("driver roster by race plan", DRIVER_ROSTER_BY_RACE_PLAN, (1,)),
+
+    # ----- users -----
+    PlanCheck("user tokens", USER_TOKENS, (1,)),
+
+    # ----- conditional requests -----
+    PlanCheck("table versions", TABLE_VERSIONS.format(ids=_IN3), ("cars", "events", "teams")),
+]
+
+# Checked against the response cache database
+CACHE_HOT_QUERIES: List[PlanCheck] = [
+    PlanCheck("cache entry", CACHE_ENTRY_SELECT, ("k",)),
+    PlanCheck("cache expired batch", REAP_EXPIRED_BATCH, ("2026-01-01T00:00:00", 500)),
+    PlanCheck("cache tag keys", TAG_KEYS_SELECT.format(tags=_IN3), ("user:1", "season:1", "team:1")),
+    PlanCheck("cache tag invalidation", TAG_INVALIDATION.format(tags=_IN3), ("user:1", "season:1", "team:1")),
+    PlanCheck("cache tags delete by key", TAGS_DELETE_FOR_KEY, ("k",)),
+    PlanCheck("cache prefix invalidation", PREFIX_INVALIDATION, ("1_", "1`")),
+    # Walks the last_access index and stops at LIMIT
+    PlanCheck("cache least recently used", LEAST_RECENTLY_USED, (500,), ("cache",)),
+]
+
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE\b|ON\b|JOIN\b|LEFT\b|INNER\b|ORDER\b|GROUP\b|LIMIT\b)(\w+))?",
+    re.IGNORECASE)
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_LOOKUP = re.compile(r"^(?:SCAN|SEARCH) (?:TABLE )?(\w+)")
+_INDEX_ONLY = ("COVERING INDEX", "INTEGER PRIMARY KEY", "PRIMARY KEY (rowid", "AUTOMATIC")
+
+
+def _aliases(sql: str) -> dict:
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    return aliases
+
+
+def explain(db, sql: str, params=()) -> List[str]:
+    return [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def check_query_plans(db, checks: List[PlanCheck] = HOT_QUERIES) -> List[str]:
+    """
+    Return one message per plan step that does a full scan of a growing
+    table, sorts through a temporary b-tree, or (for covering checks)
+    reads table rows instead of answering from an index
+    """
+    failures = []
+    for check in checks:
+        aliases = _aliases(check.sql)
+        for detail in explain(db, check.sql, check.params):
+            if detail.startswith("USE TEMP B-TREE"):
+                failures.append(f"{check.name}: {detail}")
+                continue
+            match = _SCAN.match(detail)
+            if match:
+                table = aliases.get(match.group(1), match.group(1))
+                if table in GROWING_TABLES and table not in check.allow_scan:
+                    failures.append(f"{check.name}: {detail}")
+                    continue
+            if check.covering and _LOOKUP.match(detail) and not any(s in detail for s in _INDEX_ONLY):
+                failures.append(f"{check.name}: not covered: {detail}")
+    return failures
+
+
+def _report(path: str, pragmas: dict, checks: List[PlanCheck]) -> List[str]:
+    db = open_connection(path, pragmas)
+    try:
+        for check in checks:
+            print(check.name)
+            for detail in explain(db, check.sql, check.params):
+                print(f"    {detail}")
+        return check_query_plans(db, checks)
+    finally:
+        db.close()
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.db")
+        cache_path = os.path.join(tmp, "plans-cache.db")
+        migrate(path)
+        migrate_cache(cache_path)
+        failures = _report(path, APP_PRAGMAS, HOT_QUERIES)
+        failures += _report(cache_path, CACHE_PRAGMAS, CACHE_HOT_QUERIES)
+
+    if failures:
+        print(f"\n{len(failures)} plan problem(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+
+    total = len(HOT_QUERIES) + len(CACHE_HOT_QUERIES)
+    print(f"\nOK: {total} queries, no full scans on growing tables, no temporary sorts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
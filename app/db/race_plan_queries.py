@@ -1,66 +1,47 @@
 """
 Database queries for Race Plan
 """
-from app.cache.db import get_db
+from app.cache.db import get_db, run_write
 from app.models.race_plan import (
     RacePlanResponse,
     RacePlanRequest
 )
 
-def init_race_plan_db():
-    """Initialize the database with the necessary tables"""
-    db = get_db()
-
-    db.execute("""
-    CREATE TABLE IF NOT EXISTS race_plans (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        team_id INTEGER NOT NULL,
-        car_id INTEGER NOT NULL,
-        event_id INTEGER NOT NULL,
-        time_slot TEXT NOT NULL,
-
-        FOREIGN KEY (team_id) REFERENCES teams(id) ON DELETE CASCADE,
-        FOREIGN KEY (car_id) REFERENCES cars(id) ON DELETE CASCADE,
-        FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
-    )
-    """)
-
-    db.commit()
-
 def create_race_plan(plan: RacePlanRequest) -> RacePlanResponse:
     """Create a new race plan"""
-    db = get_db()
-
-    db.execute("""
-    INSERT INTO race_plans (id, team_id, car_id, time_slot, event_id)
-    VALUES (?, ?, ?, ?, ?)
-    """, (None, plan.team_id, plan.car_id, plan.time_slot, plan.event_id))
+    def write(db):
+        cursor = db.execute("""
+        INSERT INTO race_plans (id, team_id, car_id, time_slot, event_id)
+        VALUES (?, ?, ?, ?, ?)
+        """, (None, plan.team_id, plan.car_id, plan.time_slot, plan.event_id))
+        return cursor.lastrowid
 
-    db.commit()
     return RacePlanResponse(
-        id=db.execute("SELECT last_insert_rowid()").fetchone()[0],
+        id=run_write(write),
         team_id=plan.team_id,
         car_id=plan.car_id,
         event_id=plan.event_id,
         time_slot=plan.time_slot
     )
 
-def get_race_plan_by_team_and_event(team_id: int, event_id: int) -> RacePlanResponse:
-    db = get_db()
-
-    row = db.execute("""
-        SELECT id, team_id, car_id, event_id, time_slot
-        FROM race_plans
-        WHERE team_id=? AND event_id=?
-    """, (team_id, event_id)).fetchone()
+RACE_PLAN_BY_TEAM_AND_EVENT = """
+    SELECT id, team_id, car_id, event_id, time_slot
+    FROM race_plans
+    WHERE team_id=? AND event_id=?
+"""
 
-    if not row:
-        raise ValueError("Race plan not found")
 
-    return RacePlanResponse(
-        id=row[0],
-        team_id=row[1],
-        car_id=row[2],
-        event_id=row[3],
-        time_slot=row[4]
-    )
\ No newline at end of file
+def get_race_plan_by_team_and_event(team_id: int, event_id: int) -> RacePlanResponse:
+    with get_db() as db:
+        row = db.execute(RACE_PLAN_BY_TEAM_AND_EVENT, (team_id, event_id)).fetchone()
+
+        if not row:
+            raise ValueError("Race plan not found")
+
+        return RacePlanResponse(
+            id=row[0],
+            team_id=row[1],
+            car_id=row[2],
+            event_id=row[3],
+            time_slot=row[4]
+        )
\ No newline at end of file
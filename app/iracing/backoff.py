@@ -0,0 +1,94 @@
+"""
+Negative cache with per-key exponential backoff for failing upstream calls
+"""
+import time
+from collections import defaultdict, namedtuple
+from typing import Dict, Optional
+
+from app.config import settings
+from .errors import IRacingAPIError, UpstreamBackoffError
+
+BackoffPolicy = namedtuple("BackoffPolicy", ["base_seconds", "max_seconds"])
+
+# A 4xx will fail the same way until something changes (bad id, expired
+# token), so it is remembered longest. 5xx and connection errors are
+# usually transient. 429 defers to Retry-After when iRacing sends one.
+POLICIES: Dict[str, BackoffPolicy] = {
+    "4xx": BackoffPolicy(settings.UPSTREAM_BACKOFF_4XX_SECONDS, settings.UPSTREAM_BACKOFF_4XX_MAX_SECONDS),
+    "5xx": BackoffPolicy(settings.UPSTREAM_BACKOFF_5XX_SECONDS, settings.UPSTREAM_BACKOFF_5XX_MAX_SECONDS),
+    "429": BackoffPolicy(settings.UPSTREAM_BACKOFF_429_SECONDS, settings.UPSTREAM_BACKOFF_429_MAX_SECONDS),
+}
+
+_Failure = namedtuple("_Failure", ["error", "failures", "until"])
+
+
+class UpstreamBackoff:
+    """
+    Remembers the last failure per cache key. While a key is backing off,
+    check() raises the remembered error instead of letting the caller go
+    upstream. Each consecutive failure of the same key doubles the delay,
+    up to the status class's maximum; a success clears it.
+    """
+
+    def __init__(self, policies: Dict[str, BackoffPolicy] = POLICIES):
+        self.policies = policies
+        self._failures: Dict[str, _Failure] = {}
+        self._counters = defaultdict(lambda: {"failures": 0, "suppressed": 0})
+
+    def check(self, key: str) -> None:
+        failure = self._failures.get(key)
+        if failure is None:
+            return
+        remaining = failure.until - time.monotonic()
+        if remaining <= 0:
+            return
+        self._counters[failure.error.status_class]["suppressed"] += 1
+        error = failure.error
+        raise UpstreamBackoffError(
+            f"{error.message} (backing off for {remaining:.0f}s)",
+            status_code=error.status_code, url=error.url, retry_after=remaining)
+
+    def record_failure(self, key: str, error: IRacingAPIError) -> float:
+        """Start or extend the backoff for key; returns the delay in seconds"""
+        previous = self._failures.get(key)
+        failures = previous.failures + 1 if previous else 1
+        policy = self.policies[error.status_class]
+        delay = min(policy.base_seconds * 2 ** (failures - 1), policy.max_seconds)
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        self._failures[key] = _Failure(error, failures, time.monotonic() + delay)
+        self._counters[error.status_class]["failures"] += 1
+        return delay
+
+    def record_success(self, key: str) -> None:
+        self._failures.pop(key, None)
+
+    def remaining(self, key: str) -> Optional[float]:
+        failure = self._failures.get(key)
+        if failure is None:
+            return None
+        remaining = failure.until - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        # Forget keys whose backoff ran out long ago; a new failure restarts at the base delay
+        expired = [key for key, failure in self._failures.items()
+                   if now - failure.until > self.policies[failure.error.status_class].max_seconds]
+        for key in expired:
+            del self._failures[key]
+
+        backing_off = {
+            key: {
+                "status_code": failure.error.status_code,
+                "status_class": failure.error.status_class,
+                "failures": failure.failures,
+                "remaining_seconds": round(failure.until - now, 1),
+            }
+            for key, failure in self._failures.items() if failure.until > now
+        }
+        return {
+            "keys_backing_off": len(backing_off),
+            "keys": backing_off,
+            "by_status_class": {status_class: dict(counters) for status_class, counters in sorted(self._counters.items())},
+        }
@@ -0,0 +1,122 @@
+"""
+Chunked iRacing results (results/search_series, search_hosted, lap_data, ...)
+
+These endpoints return a chunk_info block instead of rows:
+
+    {"chunk_info": {"rows": 1234, "base_download_url": "https://.../",
+                    "chunk_file_names": ["a.json", "b.json"], ...}, ...}
+
+search_* nest it under "data". Each chunk file is a JSON array of rows.
+ChunkedResult downloads the chunks concurrently and yields their rows in
+order as one stream, holding at most IRACING_CHUNK_CONCURRENCY chunks.
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from app.config import settings
+from .client import download_to_spool, iracing_get
+from .errors import IRacingAPIError
+from .streaming import SpooledRows
+
+SEARCH_SERIES_URL = "https://members-ng.iracing.com/data/results/search_series"
+SEARCH_HOSTED_URL = "https://members-ng.iracing.com/data/results/search_hosted"
+LAP_DATA_URL = "https://members-ng.iracing.com/data/results/lap_data"
+
+
+def find_chunk_info(payload) -> Optional[dict]:
+    if not isinstance(payload, dict):
+        return None
+    if isinstance(payload.get("chunk_info"), dict):
+        return payload["chunk_info"]
+    data = payload.get("data")
+    if isinstance(data, dict) and isinstance(data.get("chunk_info"), dict):
+        return data["chunk_info"]
+    return None
+
+
+class ChunkedResult:
+    """
+    payload is the decoded response carrying chunk_info; everything else in
+    it (session details for lap_data, search parameters) stays available.
+    """
+
+    def __init__(self, url: str, payload: dict, concurrency: int = settings.IRACING_CHUNK_CONCURRENCY):
+        self.url = url
+        self.payload = payload
+        self.concurrency = concurrency
+        self.chunk_info = find_chunk_info(payload) or {}
+        self.file_names = self.chunk_info.get("chunk_file_names") or []
+        self.expected_rows = self.chunk_info.get("rows")
+
+    async def iter_rows(self) -> AsyncIterator:
+        """
+        Rows of every chunk, in chunk order. Downloads run ahead of the
+        consumer by at most concurrency chunks; a chunk's slot is freed
+        once its rows have been consumed. Raises IRacingAPIError if the
+        row count differs from chunk_info.rows.
+        """
+        base_url = self.chunk_info.get("base_download_url", "")
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def download(name: str):
+            # Semaphore waiters are woken in order, so chunk n never waits
+            # on a slot held by a chunk after it
+            await slots.acquire()
+            try:
+                return await download_to_spool(base_url + name, self.url)
+            except BaseException:
+                slots.release()
+                raise
+
+        tasks = [asyncio.ensure_future(download(name)) for name in self.file_names]
+        rows = 0
+        try:
+            for task in tasks:
+                payload = await task
+                try:
+                    async for row in payload.aiter_items():
+                        rows += 1
+                        yield row
+                finally:
+                    payload.close()
+                    slots.release()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    # Downloaded but never consumed
+                    task.result().close()
+
+        if self.expected_rows is not None and rows != self.expected_rows:
+            raise IRacingAPIError(
+                f"Chunked result has {rows} rows, chunk_info says {self.expected_rows}", url=self.url)
+
+    async def iter_json(self) -> AsyncIterator[bytes]:
+        """
+        The rows as one JSON array, encoded a row at a time, for a
+        StreamingResponse. A row count mismatch raises after the rows have
+        been sent, which aborts the response.
+        """
+        yield b"["
+        first = True
+        async for row in self.iter_rows():
+            yield (b"" if first else b",") + json.dumps(row, separators=(",", ":")).encode()
+            first = False
+        yield b"]"
+
+    async def to_store(self, store: Optional[SpooledRows] = None) -> SpooledRows:
+        """Write every row into store (a new SpooledRows by default) and return it"""
+        store = store if store is not None else SpooledRows()
+        async for row in self.iter_rows():
+            store.append(row)
+        return store
+
+
+async def fetch_chunked(url: str, token: str, concurrency: int = settings.IRACING_CHUNK_CONCURRENCY) -> ChunkedResult:
+    """Fetch the chunk_info for url; iterate the returned ChunkedResult for its rows"""
+    payload = await iracing_get(url, token)
+    if find_chunk_info(payload) is None:
+        raise IRacingAPIError("Response has no chunk_info", url=url)
+    return ChunkedResult(url, payload, concurrency)
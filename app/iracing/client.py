@@ -1,19 +1,76 @@
+import email.utils
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
 import httpx
 
+from app.config import settings
+from .errors import IRacingAPIError
+from .http import http_clients
+from .ratelimit import rate_limiter
+from .resilience import resilience
+from .streaming import SpooledPayload
 
-async def iracing_get(url: str, token: str):
-    async with httpx.AsyncClient() as client:
-        # Step 1: call the iRacing API endpoint
-        print(token, url)
-        resp = await client.get(
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    """Retry-After as seconds; iRacing may send either seconds or an HTTP date"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _error(message: str, resp: httpx.Response, url: str) -> IRacingAPIError:
+    return IRacingAPIError(f"{message} ({resp.status_code}): {resp.text[:200]}",
+                           status_code=resp.status_code, url=url, retry_after=_retry_after(resp))
+
+
+async def _api_attempt(url: str, token: str):
+    # Waits (rather than fails) while the data API quota is used up
+    await rate_limiter.acquire()
+    try:
+        resp = await http_clients.get(
             url,
             headers={"Authorization": f"Bearer {token}"}
         )
+    except httpx.HTTPError as e:
+        raise IRacingAPIError(f"iRacing API request failed: {e!r}", url=url) from e
 
+    rate_limiter.update(resp, _retry_after(resp))
     if resp.status_code != 200:
-        raise Exception(f"iRacing API error: {resp.text}")
+        raise _error("iRacing API error", resp, url)
 
-    data = resp.json()
+    return resp.json()
+
+
+async def _api_get(url: str, token: str):
+    """Step 1: call the iRacing API endpoint; returns its decoded JSON"""
+    return await resilience.call("api", url, lambda: _api_attempt(url, token))
+
+
+async def _link_attempt(signed_url: str, url: str):
+    try:
+        real_resp = await http_clients.get(signed_url)
+    except httpx.HTTPError as e:
+        raise IRacingAPIError(f"Failed to fetch signed data: {e!r}", url=url) from e
+
+    if real_resp.status_code != 200:
+        raise _error("Failed to fetch signed data", real_resp, url)
+
+    return real_resp.json()
+
+
+async def iracing_get(url: str, token: str):
+    data = await _api_get(url, token)
 
     # Some endpoints return data directly,
     # but MOST return a "link"
@@ -24,10 +81,50 @@ async def iracing_get(url: str, token: str):
     signed_url = data["link"]
 
     # Step 2: fetch the real JSON from the S3 signed URL
-    async with httpx.AsyncClient() as client:
-        real_resp = await client.get(signed_url)
+    return await resilience.call("link", signed_url, lambda: _link_attempt(signed_url, url))
 
-    if real_resp.status_code != 200:
-        raise Exception(f"Failed to fetch signed data: {real_resp.text}")
 
-    return real_resp.json()
+async def _spool_attempt(signed_url: str, url: str) -> SpooledPayload:
+    payload = SpooledPayload()
+    try:
+        async with http_clients.stream("GET", signed_url) as real_resp:
+            if real_resp.status_code != 200:
+                await real_resp.aread()
+                raise _error("Failed to fetch signed data", real_resp, url)
+            async for chunk in real_resp.aiter_bytes(settings.IRACING_STREAM_CHUNK_BYTES):
+                payload.write(chunk)
+    except httpx.HTTPError as e:
+        payload.close()
+        raise IRacingAPIError(f"Failed to fetch signed data: {e!r}", url=url) from e
+    except BaseException:
+        payload.close()
+        raise
+    return payload
+
+
+async def download_to_spool(signed_url: str, url: str) -> SpooledPayload:
+    """
+    Stream an unauthenticated signed-link body into a new SpooledPayload.
+    url is the API URL it was obtained from, for errors. The caller closes
+    the payload.
+    """
+    return await resilience.call("link", signed_url, lambda: _spool_attempt(signed_url, url))
+
+
+@asynccontextmanager
+async def iracing_stream(url: str, token: str):
+    """
+    Like iracing_get, but the signed-link body is streamed into a
+    SpooledPayload instead of being decoded; iterate it with aiter_items().
+    The payload is freed when the context exits.
+    """
+    data = await _api_get(url, token)
+    if "link" in data:
+        payload = await download_to_spool(data["link"], url)
+    else:
+        # Direct payloads are small; spool them for a uniform interface
+        payload = SpooledPayload()
+        payload.write(json.dumps(data).encode())
+    with payload:
+        yield payload
+
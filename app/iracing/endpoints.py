@@ -1,6 +1,16 @@
-from app.db.events_queries import upsert_teams
-from .client import iracing_get
-from app.cache.cache import get_cache, set_cache
+from datetime import datetime
+from typing import Iterable, Optional
+from urllib.parse import urlencode
+
+from app.cache.scopes import CacheScope, scoped_key
+from app.cache.status import CacheState, set_cache_status
+from app.db.aio import get_cache_entry, set_cache, upsert_teams
+from .backoff import UpstreamBackoff
+from .chunks import LAP_DATA_URL, ChunkedResult, fetch_chunked
+from .client import iracing_stream
+from .errors import IRacingAPIError
+from .policies import policy_for
+from .singleflight import SingleFlight
 from app.config import settings
 
 SERIES_URL = "https://members-ng.iracing.com/data/series/seasons"
@@ -8,16 +18,109 @@ SCHEDULE_URL = "https://members-ng.iracing.com/data/series/schedule"
 EVENTS_URL = "https://members-ng.iracing.com/data/special_events/list"
 TEAMS_URL = "https://members-ng.iracing.com/data/team/membership"
 
-async def cached_call(key: str, url: str, token: str, user_id: str, ttl_hours=24*7):
-    cache_key = f"{user_id}_{key}"
-    cached = get_cache(cache_key)
-    if cached:
-        print(cached)
-        return cached
+upstream_flights = SingleFlight()
+upstream_backoff = UpstreamBackoff()
+
+
+def _age_hours(entry) -> float:
+    return (datetime.utcnow() - entry.stored_at).total_seconds() / 3600
+
+
+async def cached_call(key: str, url: str, token: str, user_id: str, ttl_hours: float = None,
+                      scope: CacheScope = None, team_id: int = None,
+                      hard_ttl_hours: float = None, tags: Iterable[str] = ()):
+    """
+    Return the cached payload for key, fetching url with token on a miss.
+    TTLs and scope default to the policy registered for url's path (see
+    app/iracing/policies.py); explicit arguments take precedence.
+
+    GLOBAL entries are shared by every user and filled with whichever
+    caller's token misses first. Concurrent misses on the same key share
+    one upstream fetch, and a key whose fetch failed is not retried
+    upstream until its backoff runs out. A 401/403 only backs off the user
+    whose token got it; other callers of a shared key that were waiting on
+    that fetch retry with their own token.
+
+    ttl_hours is the soft TTL: older entries are still served, while a
+    background refresh replaces them, until hard_ttl_hours. Past that the
+    caller waits for upstream, and if upstream fails the last good value
+    is served instead of an error.
+
+    Entries are tagged with their endpoint path and owning user or team,
+    plus any extra tags, for app.cache.cache.invalidate_tags().
+    """
+    policy = policy_for(url)
+    if ttl_hours is None:
+        ttl_hours = policy.ttl_seconds / 3600
+        if hard_ttl_hours is None:
+            hard_ttl_hours = policy.hard_ttl_seconds / 3600
+    if hard_ttl_hours is None:
+        hard_ttl_hours = ttl_hours * 2
+    scope = scope or policy.scope
+    cache_key = scoped_key(key, scope, user_id, team_id)
+    tags = [f"endpoint:{policy.path}", *tags]
+    if scope == CacheScope.USER:
+        tags.append(f"user:{user_id}")
+    elif scope == CacheScope.TEAM:
+        tags.append(f"team:{team_id}")
+
+    # Token failures are remembered per user, so one expired token cannot
+    # block a shared key for everyone
+    user_key = f"{cache_key}#user{user_id}"
 
-    data = await iracing_get(url, token)
-    set_cache(cache_key, data, ttl_hours)
-    return data
+    async def fetch():
+        # Another flight may have refreshed the entry since our read
+        entry = await get_cache_entry(cache_key)
+        if entry is not None and _age_hours(entry) < ttl_hours:
+            return entry
+        # Fails fast with the remembered error while the key is backing off
+        upstream_backoff.check(cache_key)
+        upstream_backoff.check(user_key)
+        try:
+            async with iracing_stream(url, token) as payload:
+                # Decoded off the event loop; the downloaded bytes are
+                # copied into the cache row rather than encoded again
+                data = await payload.aload()
+                upstream_backoff.record_success(cache_key)
+                upstream_backoff.record_success(user_key)
+                return await set_cache(cache_key, data, hard_ttl_hours + settings.CACHE_STALE_IF_ERROR_HOURS,
+                                       tags, spool=payload)
+        except IRacingAPIError as e:
+            upstream_backoff.record_failure(user_key if e.token_specific else cache_key, e)
+            raise
+
+    async def fetch_shared():
+        try:
+            return await upstream_flights.do(cache_key, fetch)
+        except IRacingAPIError as e:
+            if not e.token_specific or scope == CacheScope.USER:
+                raise
+            # The flight may have run with another user's token; try ours.
+            # If it was ours, the per-user backoff fails this at once.
+            return await upstream_flights.do(user_key, fetch)
+
+    entry = await get_cache_entry(cache_key)
+    if entry is not None:
+        age = _age_hours(entry)
+        if age < ttl_hours:
+            set_cache_status(CacheState.HIT, age * 3600, entry)
+            return entry.value
+        if age < hard_ttl_hours:
+            upstream_flights.start(cache_key, fetch)
+            set_cache_status(CacheState.STALE, age * 3600, entry)
+            return entry.value
+
+    try:
+        fetched = await fetch_shared()
+    except Exception as e:
+        if entry is None:
+            raise
+        print(f"Serving stale {cache_key} after upstream error: {e}")
+        set_cache_status(CacheState.STALE_IF_ERROR, _age_hours(entry) * 3600, entry)
+        return entry.value
+
+    set_cache_status(CacheState.MISS, entry=fetched)
+    return fetched.value
 
 
 async def get_series(token: str, user_id: str):
@@ -26,7 +129,7 @@ async def get_series(token: str, user_id: str):
 
 async def get_schedule(season_id: int, token: str, user_id: str):
     url = f"{SCHEDULE_URL}?season_id={season_id}"
-    return await cached_call(f"schedule_{season_id}", url, token, user_id)
+    return await cached_call(f"schedule_{season_id}", url, token, user_id, tags=[f"season:{season_id}"])
 
 
 async def get_special_events(token: str, user_id: str):
@@ -46,10 +149,25 @@ async def get_teams(token: str, user_id: str):
                     'admin': team.get('admin'),
                 })
         if processed_teams:
-            upsert_teams(processed_teams)
+            await upsert_teams(processed_teams)
 
     except Exception as e:
         print(f"Error syncing teams from iRacing API: {str(e)}")
         raise
 
     return await cached_call("teams", TEAMS_URL, token, user_id)
+
+
+async def get_lap_data(subsession_id: int, simsession_number: int, token: str,
+                       cust_id: Optional[int] = None, team_id: Optional[int] = None) -> ChunkedResult:
+    """
+    Laps of one driver (cust_id) or team (team_id) in a session. Not
+    cached: the chunks are downloaded concurrently as the result is
+    iterated, and merged in chunk order.
+    """
+    params = {"subsession_id": subsession_id, "simsession_number": simsession_number}
+    if cust_id is not None:
+        params["cust_id"] = cust_id
+    if team_id is not None:
+        params["team_id"] = team_id
+    return await fetch_chunked(f"{LAP_DATA_URL}?{urlencode(params)}", token)
@@ -0,0 +1,44 @@
+"""
+Errors raised for failed iRacing upstream requests
+"""
+from typing import Optional
+
+
+class IRacingAPIError(Exception):
+    """
+    A non-200 response (or no response at all) from iRacing.
+
+    status_code is None when the request never got a response (connection
+    error or timeout). retry_after is in seconds, when iRacing or our own
+    backoff says when to try again.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 url: Optional[str] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.url = url
+        self.retry_after = retry_after
+
+    @property
+    def status_class(self) -> str:
+        """One of 429, 4xx or 5xx; connection failures count as 5xx"""
+        if self.status_code == 429:
+            return "429"
+        if self.status_code is not None and 400 <= self.status_code < 500:
+            return "4xx"
+        return "5xx"
+
+    @property
+    def token_specific(self) -> bool:
+        """401/403: says something about the caller's token, not about the resource"""
+        return self.status_code in (401, 403)
+
+
+class UpstreamBackoffError(IRacingAPIError):
+    """Raised without calling iRacing while a key is backing off after failures"""
+
+
+class CircuitOpenError(IRacingAPIError):
+    """Raised without calling iRacing while the host's circuit breaker is open"""
@@ -0,0 +1,119 @@
+"""
+Shared HTTP clients for iRacing traffic, one pooled client per upstream host
+
+The data API, the signed-link host and the OAuth server each get a client
+that keeps connections alive between calls, so a request reuses an open
+TLS connection instead of paying a new handshake. Clients are created on
+first use and closed from the FastAPI lifespan.
+"""
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+class HostClients:
+    """httpx.AsyncClient per scheme://host, with request and pool counters"""
+
+    def __init__(self, limits: httpx.Limits, timeout: httpx.Timeout, http2: bool):
+        if http2 and not _HTTP2_AVAILABLE:
+            print("IRACING_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        self.limits = limits
+        self.timeout = timeout
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._counters = defaultdict(lambda: {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0})
+
+    def _client(self, origin: str) -> httpx.AsyncClient:
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+            self._clients[origin] = client
+        return client
+
+    @asynccontextmanager
+    async def _track(self, url: str):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        counters = self._counters[origin]
+        counters["requests"] += 1
+        counters["in_flight"] += 1
+        counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+        try:
+            yield self._client(origin)
+        except httpx.HTTPError:
+            counters["errors"] += 1
+            raise
+        finally:
+            counters["in_flight"] -= 1
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self._track(url) as client:
+            return await client.request(method, url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Response whose body has not been read yet; iterate it with aiter_bytes()"""
+        async with self._track(url) as client:
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> dict:
+        hosts = {}
+        for origin, counters in sorted(self._counters.items()):
+            host = dict(counters)
+            client = self._clients.get(origin)
+            # httpx has no public pool API; read httpcore's connection list
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            host["connections"] = len(connections)
+            host["idle_connections"] = sum(1 for connection in connections if connection.is_idle())
+            hosts[origin] = host
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "hosts": hosts,
+        }
+
+
+http_clients = HostClients(
+    limits=httpx.Limits(
+        max_connections=settings.IRACING_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.IRACING_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.IRACING_HTTP_KEEPALIVE_EXPIRY_S,
+    ),
+    timeout=httpx.Timeout(
+        settings.IRACING_HTTP_READ_TIMEOUT_S,
+        connect=settings.IRACING_HTTP_CONNECT_TIMEOUT_S,
+        pool=settings.IRACING_HTTP_POOL_TIMEOUT_S,
+    ),
+    http2=settings.IRACING_HTTP2,
+)
+
+
+async def close_http_clients() -> None:
+    await http_clients.aclose()
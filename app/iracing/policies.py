@@ -0,0 +1,128 @@
+"""
+Cache policy per upstream iRacing data path
+
+Defaults come from expirationSeconds in the bundled iRacing_api_doc.json,
+which is how long iRacing itself considers each response fresh. OVERRIDES
+(and the optional CACHE_POLICY_OVERRIDES_FILE) adjust that for data whose
+real change rate is known to be slower.
+
+Entries are cached per user unless an override marks the path GLOBAL:
+many endpoints default cust_id to the authenticated member or answer for
+them alone (stats/member_*, league/cust_league_sessions, hosted/sessions),
+so only catalogs known to be the same for everyone are shared.
+"""
+import json
+import os
+from collections import namedtuple
+from enum import Enum
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.cache.scopes import CacheScope
+from app.config import settings
+
+
+class RefreshStrategy(str, Enum):
+    # Serve the stale value while a background refresh runs (up to hard TTL)
+    STALE_WHILE_REVALIDATE = "stale-while-revalidate"
+    # Never serve past the soft TTL except when upstream fails
+    BLOCKING = "blocking"
+
+
+CachePolicy = namedtuple("CachePolicy", ["path", "ttl_seconds", "hard_ttl_seconds", "scope", "refresh"])
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+GLOBAL = CacheScope.GLOBAL
+
+# Keyed by path below /data/. Any CachePolicy field except path may be set.
+OVERRIDES: Dict[str, dict] = {
+    # Effectively constant between iRacing releases
+    "constants/categories": {"ttl_seconds": 7 * DAY, "scope": GLOBAL},
+    "constants/divisions": {"ttl_seconds": 7 * DAY, "scope": GLOBAL},
+    "constants/event_types": {"ttl_seconds": 7 * DAY, "scope": GLOBAL},
+    "lookup/countries": {"ttl_seconds": 7 * DAY, "scope": GLOBAL},
+    "lookup/licenses": {"ttl_seconds": 7 * DAY, "scope": GLOBAL},
+    "lookup/flairs": {"ttl_seconds": 7 * DAY, "scope": GLOBAL},
+    "lookup/get": {"scope": GLOBAL},
+    # Catalogs change with builds and new content
+    "car/get": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "car/assets": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "carclass/get": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "track/get": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "track/assets": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "series/get": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "series/assets": {"ttl_seconds": DAY, "scope": GLOBAL},
+    "series/past_seasons": {"scope": GLOBAL},
+    "series/stats_series": {"scope": GLOBAL},
+    # Seasons roll over quarterly; schedules are set for the season
+    "lookup/current_season": {"ttl_seconds": 6 * HOUR, "scope": GLOBAL},
+    "season/list": {"scope": GLOBAL},
+    "series/seasons": {"ttl_seconds": 6 * HOUR, "scope": GLOBAL},
+    "series/season_list": {"ttl_seconds": 6 * HOUR, "scope": GLOBAL},
+    "series/season_schedule": {"ttl_seconds": 6 * HOUR, "scope": GLOBAL},
+    # Used by the app but not described in the API doc
+    "series/schedule": {"ttl_seconds": 6 * HOUR, "scope": GLOBAL},
+    "special_events/list": {"ttl_seconds": 6 * HOUR, "scope": GLOBAL},
+    # Changes whenever the user joins or leaves a team
+    "team/membership": {"ttl_seconds": 15 * 60, "hard_ttl_seconds": HOUR},
+}
+
+
+def data_path(url: str) -> str:
+    """Path below /data/, e.g. .../data/series/seasons?season_id=1 -> series/seasons"""
+    path = urlparse(url).path.strip("/")
+    return path[len("data/"):] if path.startswith("data/") else path
+
+
+def _policy(path: str, default_ttl_seconds: float, fields: dict) -> CachePolicy:
+    scope = CacheScope(fields.get("scope", CacheScope.USER))
+    refresh = RefreshStrategy(fields.get("refresh", RefreshStrategy.STALE_WHILE_REVALIDATE))
+    ttl_seconds = fields.get("ttl_seconds", default_ttl_seconds)
+    hard_ttl_seconds = fields.get("hard_ttl_seconds")
+    if hard_ttl_seconds is None:
+        hard_ttl_seconds = ttl_seconds if refresh == RefreshStrategy.BLOCKING else ttl_seconds * 2
+    return CachePolicy(path, ttl_seconds, hard_ttl_seconds, scope, refresh)
+
+
+def load_policies(doc_path: str = settings.IRACING_API_DOC_PATH,
+                  overrides_path: Optional[str] = settings.CACHE_POLICY_OVERRIDES_FILE) -> Dict[str, CachePolicy]:
+    defaults: Dict[str, float] = {}
+    try:
+        with open(doc_path) as f:
+            doc = json.load(f)
+        for group in doc.values():
+            for endpoint in group.values():
+                if "link" in endpoint and "expirationSeconds" in endpoint:
+                    defaults[data_path(endpoint["link"])] = endpoint["expirationSeconds"]
+    except (OSError, ValueError) as e:
+        print(f"Could not load iRacing API doc {doc_path}: {e}")
+
+    overrides = {path: dict(fields) for path, fields in OVERRIDES.items()}
+    if overrides_path and os.path.exists(overrides_path):
+        with open(overrides_path) as f:
+            for path, fields in json.load(f).items():
+                overrides.setdefault(path, {}).update(fields)
+
+    ttl_default = settings.CACHE_DEFAULT_TTL_HOURS * HOUR
+    return {
+        path: _policy(path, defaults.get(path, ttl_default), overrides.get(path, {}))
+        for path in defaults.keys() | overrides.keys()
+    }
+
+
+POLICIES = load_policies()
+
+
+def policy_for(url: str) -> CachePolicy:
+    """
+    Policy for an upstream URL. Paths not in the registry get
+    CACHE_DEFAULT_TTL_HOURS; like every path not marked GLOBAL, they are
+    cached per user, since nothing says their responses are safe to share.
+    """
+    path = data_path(url)
+    policy = POLICIES.get(path)
+    if policy is None:
+        policy = _policy(path, settings.CACHE_DEFAULT_TTL_HOURS * HOUR, {})
+    return policy
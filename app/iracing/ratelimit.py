@@ -0,0 +1,236 @@
+"""
+Rate-limit-aware scheduler for iRacing data API calls
+
+iRacing sends its quota on every data API response:
+
+    x-ratelimit-limit      requests allowed per window
+    x-ratelimit-remaining  requests left in the current window
+    x-ratelimit-reset      when the window resets (epoch seconds)
+
+Every API call takes a slot from RateLimitScheduler first. A token bucket
+refilling at limit / IRACING_RATE_LIMIT_WINDOW_S spreads calls over the
+window, and the server's remaining count caps it, so throughput stays just
+under the quota. Callers over the limit are queued, not failed.
+
+Queued calls run in priority order: INTERACTIVE (user requests) before
+BACKGROUND (sync, warm-up). BACKGROUND calls also leave the last
+IRACING_RATE_LIMIT_RESERVE requests of a window to interactive ones.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from functools import wraps
+from contextvars import ContextVar
+from typing import List, Optional
+
+import httpx
+
+from app.config import settings
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: ContextVar[int] = ContextVar("iracing_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    """iRacing calls made inside this block (and tasks started from it) queue as BACKGROUND"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def background(fn):
+    """Decorator: run the coroutine function under background_priority()"""
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with background_priority():
+            return await fn(*args, **kwargs)
+    return wrapper
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def _header_number(resp: httpx.Response, name: str) -> Optional[float]:
+    value = resp.headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class RateLimitScheduler:
+    """
+    Token bucket plus the server's view of the quota. acquire() waits until
+    a request may be sent; update() reads the quota headers of its response.
+    """
+
+    def __init__(self, limit: int, window_s: float, burst: int, reserve: int):
+        self.limit = limit
+        self.window_s = window_s
+        self.burst = burst
+        self.reserve = reserve
+        self.tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        # Server quota; None until the first response carries the headers
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+        self._changed: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._counters = {
+            name: {"requests": 0, "queued": 0, "wait_ms": 0.0, "max_wait_ms": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window_s
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _delay(self, priority: int, now: float) -> float:
+        """Seconds until a request of this priority may be sent; 0 if it may go now"""
+        self._refill(now)
+        if self.reset_at is not None and now >= self.reset_at:
+            # Window rolled over; wait for the next response to learn the new quota
+            self.remaining = self.reset_at = None
+        if self.remaining is not None:
+            floor = self.reserve if priority == BACKGROUND else 0
+            if self.remaining <= floor:
+                return self.reset_at - now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def _take(self) -> None:
+        self.tokens -= 1
+        if self.remaining is not None:
+            self.remaining -= 1
+
+    def _give_back(self) -> None:
+        self.tokens += 1
+        if self.remaining is not None:
+            self.remaining += 1
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        """Wait for a request slot; higher priority callers are served first"""
+        priority = current_priority() if priority is None else priority
+        counters = self._counters[PRIORITY_NAMES[priority]]
+        counters["requests"] += 1
+        if not self._waiters and self._delay(priority, time.monotonic()) <= 0:
+            self._take()
+            return
+
+        counters["queued"] += 1
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), future])
+        self._ensure_dispatcher()
+        self._changed.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.done() or future.cancelled():
+                future.cancel()
+            else:
+                # The slot was handed over just as the caller gave up
+                self._give_back()
+            raise
+        finally:
+            waited = (time.monotonic() - started) * 1000
+            counters["wait_ms"] += waited
+            counters["max_wait_ms"] = max(counters["max_wait_ms"], waited)
+
+    def _ensure_dispatcher(self) -> None:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._delay(priority, time.monotonic())
+            if delay <= 0:
+                heapq.heappop(self._waiters)
+                self._take()
+                future.set_result(None)
+                continue
+            # Woken early by a new (maybe higher priority) waiter or fresh quota headers
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def update(self, resp: httpx.Response, retry_after: Optional[float] = None) -> None:
+        """Take the quota from a response's rate-limit headers"""
+        limit = _header_number(resp, "x-ratelimit-limit")
+        remaining = _header_number(resp, "x-ratelimit-remaining")
+        reset = _header_number(resp, "x-ratelimit-reset")
+        if limit:
+            self.limit = int(limit)
+        now = time.monotonic()
+        if resp.status_code == 429:
+            # Over the quota anyway (another process sharing the client id?)
+            remaining = 0
+            if reset is None:
+                reset = retry_after if retry_after is not None else self.window_s
+        if remaining is None or reset is None:
+            return
+        # Epoch seconds per the docs; small values are treated as seconds from now
+        reset_in = reset - time.time() if reset > 1e9 else reset
+        reset_at = now + max(reset_in, 0.0)
+        if self.reset_at is not None and abs(reset_at - self.reset_at) < 1 and self.remaining is not None:
+            # Same window: responses can arrive out of order, keep the lower count
+            self.remaining = min(self.remaining, int(remaining))
+        else:
+            self.remaining = int(remaining)
+        self.reset_at = reset_at
+        if self._changed is not None:
+            self._changed.set()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        self._refill(now)
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                queued[PRIORITY_NAMES[priority]] += 1
+        return {
+            "limit": self.limit,
+            "window_s": self.window_s,
+            "remaining": self.remaining,
+            "reset_in_s": round(self.reset_at - now, 3) if self.reset_at is not None else None,
+            "reserve": self.reserve,
+            "tokens": round(self.tokens, 3),
+            "queue_depth": queued,
+            "priorities": {name: {**counters, "wait_ms": round(counters["wait_ms"], 3),
+                                  "max_wait_ms": round(counters["max_wait_ms"], 3)}
+                           for name, counters in self._counters.items()},
+        }
+
+
+rate_limiter = RateLimitScheduler(
+    limit=settings.IRACING_RATE_LIMIT,
+    window_s=settings.IRACING_RATE_LIMIT_WINDOW_S,
+    burst=settings.IRACING_RATE_LIMIT_BURST,
+    reserve=settings.IRACING_RATE_LIMIT_RESERVE,
+)
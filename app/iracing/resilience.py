@@ -0,0 +1,209 @@
+"""
+Retries and per-host circuit breakers for iRacing GETs
+
+Both hops of iracing_get are idempotent GETs, so a transient failure is
+retried instead of failing the user request. Each hop has its own policy:
+
+    api   members-ng data API; 429/5xx/connection errors are retried,
+          waiting out Retry-After when iRacing sends one
+    link  signed S3 download; 5xx/connection errors are retried. A 403
+          means the link expired, which another GET will not fix.
+
+The delay doubles per attempt up to the policy's maximum, with full
+jitter so callers that failed together do not retry together. No retry
+is started that would take the call past IRACING_RETRY_BUDGET_SECONDS.
+
+Every host has a circuit breaker. After IRACING_BREAKER_FAILURES
+consecutive failed attempts it opens, and calls fail at once with
+CircuitOpenError instead of waiting for timeouts. After
+IRACING_BREAKER_OPEN_SECONDS one probe call is let through (half open); its
+success closes the breaker, its failure opens it again. Calls that were
+already in flight when the breaker opened do not count either way.
+"""
+import asyncio
+import random
+import time
+from collections import namedtuple
+from typing import Awaitable, Callable, Dict, FrozenSet, TypeVar
+from urllib.parse import urlsplit
+
+from app.config import settings
+from .errors import CircuitOpenError, IRacingAPIError
+
+T = TypeVar("T")
+
+RetryPolicy = namedtuple("RetryPolicy", ["attempts", "base_seconds", "max_seconds", "retry_statuses"])
+
+_TRANSIENT: FrozenSet[int] = frozenset({500, 502, 503, 504})
+
+POLICIES: Dict[str, RetryPolicy] = {
+    "api": RetryPolicy(settings.IRACING_RETRY_API_ATTEMPTS, settings.IRACING_RETRY_BASE_SECONDS,
+                       settings.IRACING_RETRY_MAX_SECONDS, _TRANSIENT | {429}),
+    "link": RetryPolicy(settings.IRACING_RETRY_LINK_ATTEMPTS, settings.IRACING_RETRY_BASE_SECONDS,
+                        settings.IRACING_RETRY_MAX_SECONDS, _TRANSIENT),
+}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _is_host_failure(error: IRacingAPIError) -> bool:
+    """Whether the error says the host is unwell; 4xx (including 429) are about the request"""
+    return error.status_code is None or error.status_code >= 500
+
+
+# What before_call() let through: generation counts the breaker's openings,
+# probe marks the one call let through while half open
+Admission = namedtuple("Admission", ["generation", "probe"])
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one upstream host. Each call's outcome
+    is reported with the Admission before_call() returned for it. Outcomes
+    of calls admitted before the breaker last opened are ignored. Such a
+    call cannot end the probe, re-open the breaker or push its timer back.
+    """
+
+    def __init__(self, failure_threshold: int, open_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._generation = 0
+        self._probing = False
+        self.counters = {"opened": 0, "rejected": 0}
+
+    def before_call(self, url: str) -> Admission:
+        """Raises CircuitOpenError unless a call may go out now"""
+        if self.state == CLOSED:
+            return Admission(self._generation, False)
+        remaining = self.opened_at + self.open_seconds - self.clock()
+        if self.state == OPEN and remaining <= 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return Admission(self._generation, True)
+        self.counters["rejected"] += 1
+        raise CircuitOpenError(
+            f"iRacing host unavailable, failing fast for {max(remaining, 0):.0f}s",
+            url=url, retry_after=max(remaining, 1.0))
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self._generation += 1
+        self._probing = False
+        self.counters["opened"] += 1
+
+    def record_success(self, admission: Admission) -> None:
+        if admission.generation != self._generation:
+            return
+        if admission.probe:
+            self.state = CLOSED
+            self._probing = False
+        self.failures = 0
+
+    def record_failure(self, admission: Admission) -> None:
+        if admission.generation != self._generation:
+            return
+        self.failures += 1
+        if admission.probe or self.failures >= self.failure_threshold:
+            self._open()
+
+    def release(self, admission: Admission) -> None:
+        """The call ended without telling us about the host (4xx, cancelled)"""
+        if admission.probe and admission.generation == self._generation:
+            self._probing = False
+
+    def stats(self) -> dict:
+        stats = {"state": self.state, "consecutive_failures": self.failures, **self.counters}
+        if self.state == OPEN:
+            stats["open_remaining_seconds"] = round(
+                max(self.opened_at + self.open_seconds - self.clock(), 0.0), 1)
+        return stats
+
+
+class Resilience:
+    """Runs hop attempts with retries, behind the breaker of the URL's host"""
+
+    def __init__(self, policies: Dict[str, RetryPolicy], budget_seconds: float,
+                 failure_threshold: int, open_seconds: float):
+        self.policies = policies
+        self.budget_seconds = budget_seconds
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._counters = {hop: {"calls": 0, "retries": 0, "gave_up": 0} for hop in policies}
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.open_seconds)
+            self._breakers[host] = breaker
+        return breaker
+
+    def _delay(self, policy: RetryPolicy, attempt: int, error: IRacingAPIError) -> float:
+        delay = random.uniform(0, min(policy.base_seconds * 2 ** attempt, policy.max_seconds))
+        if error.retry_after is not None:
+            delay = max(delay, error.retry_after)
+        return delay
+
+    async def call(self, hop: str, url: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run attempt() until it succeeds or the hop's policy gives up. url
+        picks the breaker; the error of the last attempt is raised.
+        """
+        policy = self.policies[hop]
+        counters = self._counters[hop]
+        counters["calls"] += 1
+        breaker = self.breaker(url)
+        started = time.monotonic()
+        n = 0
+        while True:
+            admission = breaker.before_call(url)
+            try:
+                result = await attempt()
+            except IRacingAPIError as e:
+                if _is_host_failure(e):
+                    breaker.record_failure(admission)
+                else:
+                    breaker.release(admission)
+                error = e
+            except BaseException:
+                breaker.release(admission)
+                raise
+            else:
+                breaker.record_success(admission)
+                return result
+
+            if error.status_code is not None and error.status_code not in policy.retry_statuses:
+                raise error
+            delay = self._delay(policy, n, error)
+            n += 1
+            if n >= policy.attempts or time.monotonic() - started + delay > self.budget_seconds:
+                counters["gave_up"] += 1
+                raise error
+            counters["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "budget_seconds": self.budget_seconds,
+            "hops": {hop: {**counters, "attempts": self.policies[hop].attempts}
+                     for hop, counters in self._counters.items()},
+            "breakers": {host: breaker.stats() for host, breaker in sorted(self._breakers.items())},
+        }
+
+
+resilience = Resilience(
+    POLICIES,
+    budget_seconds=settings.IRACING_RETRY_BUDGET_SECONDS,
+    failure_threshold=settings.IRACING_BREAKER_FAILURES,
+    open_seconds=settings.IRACING_BREAKER_OPEN_SECONDS,
+)
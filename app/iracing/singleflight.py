@@ -0,0 +1,61 @@
+"""
+Per-key request coalescing for upstream iRacing fetches
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers for the same
+    key await the call already in flight instead of starting their own.
+
+    The call runs as its own task, so a caller that is cancelled (client
+    disconnected) stops waiting without cancelling the fetch for everyone
+    else. An exception raised by the call is raised in every waiter.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._calls = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._cancelled_waiters = 0
+
+    def start(self, key: str, fn: Callable[[], Awaitable]) -> asyncio.Task:
+        """Start fn for key, or join the call already in flight, without waiting for it"""
+        self._calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self._coalesced += 1
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        task = self.start(key, fn)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                self._cancelled_waiters += 1
+            raise
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled() and task.exception() is not None:
+            self._errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "calls": self._calls,
+            "upstream_calls": self._calls - self._coalesced,
+            "coalesced": self._coalesced,
+            "errors": self._errors,
+            "cancelled_waiters": self._cancelled_waiters,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,206 @@
+"""
+Spooled iRacing payloads with incremental decoding of top-level JSON arrays
+
+A streamed download is written to a SpooledTemporaryFile as it arrives:
+held in memory up to IRACING_SPOOL_MAX_MEMORY_BYTES, on disk past that.
+iter_items() then decodes one array element at a time, so a large
+payload never exists as raw bytes, decoded text and object graph at once.
+
+Reading a spilled file and decoding JSON block, so async code uses the
+a-prefixed methods, which do that work in a worker thread.
+"""
+import asyncio
+import codecs
+import itertools
+import json
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Iterator
+
+from app.config import settings
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+class SpooledPayload:
+    """A downloaded JSON body; close() (or leaving the context) frees it"""
+
+    def __init__(self, max_memory_bytes: int = settings.IRACING_SPOOL_MAX_MEMORY_BYTES):
+        self.file = SpooledTemporaryFile(max_size=max_memory_bytes)
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def _reader(self, chunk_bytes: int) -> Iterator[str]:
+        self.file.seek(0)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        while True:
+            chunk = self.file.read(chunk_bytes)
+            if not chunk:
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield tail
+                return
+            yield decoder.decode(chunk)
+
+    def json(self):
+        """Decode the whole body at once"""
+        self.file.seek(0)
+        return json.load(self.file)
+
+    def load(self):
+        """
+        Decode the whole body. Arrays are built an element at a time, so
+        the body's text is never held whole next to the decoded value.
+        """
+        if self.is_array():
+            return list(self.iter_items())
+        return self.json()
+
+    def iter_bytes(self, chunk_bytes: int = settings.IRACING_STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """The raw body, chunk_bytes at a time, for copying it elsewhere"""
+        self.file.seek(0)
+        while True:
+            chunk = self.file.read(chunk_bytes)
+            if not chunk:
+                return
+            yield chunk
+
+    def is_array(self) -> bool:
+        for text in self._reader(256):
+            stripped = text.lstrip(_WHITESPACE)
+            if stripped:
+                return stripped[0] == "["
+        return False
+
+    def iter_items(self, chunk_bytes: int = settings.IRACING_STREAM_CHUNK_BYTES) -> Iterator:
+        """
+        Yield the elements of a top-level JSON array one at a time. Only the
+        element being decoded (and one read chunk) is held in memory.
+        """
+        decoder = json.JSONDecoder()
+        reader = self._reader(chunk_bytes)
+        buffer, pos, eof = "", 0, False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            text = next(reader, None)
+            if text is None:
+                eof = True
+                return False
+            buffer = buffer[pos:] + text
+            pos = 0
+            return True
+
+        def skip_whitespace() -> None:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        skip_whitespace()
+        if pos >= len(buffer) or buffer[pos] != "[":
+            raise ValueError("Payload is not a JSON array")
+        pos += 1
+
+        first = True
+        while True:
+            skip_whitespace()
+            if pos >= len(buffer):
+                raise ValueError("Truncated JSON array")
+            if buffer[pos] == "]":
+                return
+            if not first:
+                if buffer[pos] != ",":
+                    raise ValueError(f"Expected ',' in JSON array, got {buffer[pos]!r}")
+                pos += 1
+                skip_whitespace()
+            first = False
+
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if fill():
+                        continue
+                    raise
+                # A number cut off at the end of the buffer ("12" of "125",
+                # "-2" of "-2.5") decodes as a shorter one; only trust a
+                # value once the delimiter after it has been read
+                if end < len(buffer) and buffer[end] in _DELIMITERS:
+                    break
+                if eof or not fill():
+                    break
+            pos = end
+            yield item
+
+    async def ajson(self):
+        return await asyncio.to_thread(self.json)
+
+    async def aload(self):
+        return await asyncio.to_thread(self.load)
+
+    async def ais_array(self) -> bool:
+        return await asyncio.to_thread(self.is_array)
+
+    async def aiter_items(self, batch_items: int = settings.IRACING_STREAM_BATCH_ITEMS) -> AsyncIterator:
+        """
+        iter_items() for async code: up to batch_items elements are read and
+        decoded per worker-thread hop, and handed out on the event loop.
+        """
+        items = self.iter_items()
+        while True:
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(items, batch_items)))
+            if not batch:
+                return
+            for item in batch:
+                yield item
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SpooledRows:
+    """
+    Rows stored as JSON lines in a spooled file, for results too large to
+    keep as a list. Append everything first, then iterate to read back.
+    """
+
+    def __init__(self, max_memory_bytes: int = settings.IRACING_SPOOL_MAX_MEMORY_BYTES):
+        self.file = SpooledTemporaryFile(max_size=max_memory_bytes)
+        self.count = 0
+
+    def append(self, row) -> None:
+        self.file.write(json.dumps(row, separators=(",", ":")).encode() + b"\n")
+        self.count += 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator:
+        self.file.seek(0)
+        try:
+            for line in self.file:
+                yield json.loads(line)
+        finally:
+            # Later appends must land at the end again
+            self.file.seek(0, 2)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
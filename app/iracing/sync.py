@@ -2,91 +2,100 @@
 Utilities to sync Cars and Tracks from iRacing API
 """
 import asyncio
-from typing import List
-from app.iracing.client import iracing_get
-from app.db.events_queries import upsert_cars, upsert_tracks
+from app.iracing.client import iracing_stream
+from app.iracing.ratelimit import background
+from app.db.aio import upsert_cars, upsert_tracks
+from app.models.events import UpsertSummary
 
 
-async def sync_cars_from_iracing(access_token: str) -> List[dict]:
+@background
+async def sync_cars_from_iracing(access_token: str) -> UpsertSummary:
     """
     Fetch all cars from iRacing API and sync to database
-    Returns the list of cars that were synced
+    Returns how many cars were inserted, updated or left unchanged
     """
     url = "https://members-ng.iracing.com/data/car/get"
     
     try:
-        cars_data = await iracing_get(url, access_token)
+        async with iracing_stream(url, access_token) as payload:
+            # Array payloads are decoded one element at a time, off the event loop
+            is_array = await payload.ais_array()
         
-        # Extract necessary fields from iRacing response
-        processed_cars = []
-        if isinstance(cars_data, list):
-            for car in cars_data:
-                processed_cars.append({
-                    'car_id': car.get('car_id'),
-                    'car_name': car.get('car_name'),
-                    'logo': car.get('logo'),
-                    'tank_size': 0 # 0 for now need to get this info in the future 
-                })
-        elif isinstance(cars_data, dict) and 'cars' in cars_data:
-            for car in cars_data['cars']:
-                processed_cars.append({
-                    'car_id': car.get('car_id'),
-                    'car_name': car.get('car_name'),
-                    'logo': car.get('logo'),
-                    'tank_size': car.get('max_fuel_fill_liters', 0)
-                })
+            # Extract necessary fields from iRacing response
+            processed_cars = []
+            if is_array:
+                async for car in payload.aiter_items():
+                    processed_cars.append({
+                        'car_id': car.get('car_id'),
+                        'car_name': car.get('car_name'),
+                        'logo': car.get('logo'),
+                        'tank_size': 0 # 0 for now need to get this info in the future 
+                    })
+            else:
+                cars_data = await payload.ajson()
+                if isinstance(cars_data, dict) and 'cars' in cars_data:
+                    for car in cars_data['cars']:
+                        processed_cars.append({
+                            'car_id': car.get('car_id'),
+                            'car_name': car.get('car_name'),
+                            'logo': car.get('logo'),
+                            'tank_size': car.get('max_fuel_fill_liters', 0)
+                        })
         
         # Upsert to database
-        if processed_cars:
-            upsert_cars(processed_cars)
-        
-        return processed_cars
+        if not processed_cars:
+            return UpsertSummary()
+        return await upsert_cars(processed_cars)
     
     except Exception as e:
         print(f"Error syncing cars from iRacing API: {str(e)}")
         raise
 
 
-async def sync_tracks_from_iracing(access_token: str) -> List[dict]:
+@background
+async def sync_tracks_from_iracing(access_token: str) -> UpsertSummary:
     """
     Fetch all tracks from iRacing API and sync to database
-    Returns the list of tracks that were synced
+    Returns how many tracks were inserted, updated or left unchanged
     """
     url = "https://members-ng.iracing.com/data/track/get"
     
     try:
-        tracks_data = await iracing_get(url, access_token)
+        async with iracing_stream(url, access_token) as payload:
+            # Array payloads are decoded one element at a time, off the event loop
+            is_array = await payload.ais_array()
         
-        # Extract necessary fields from iRacing response
-        processed_tracks = []
-        if isinstance(tracks_data, list):
-            for track in tracks_data:
-                processed_tracks.append({
-                    'track_id': track.get('track_id'),
-                    'track_name': track.get('track_name'),
-                    'category': track.get('category'),
-                    'config_name': track.get('config_name'),
-                    'logo': track.get('logo'),
-                    'pit_road_speed_limit': track.get('pit_road_speed_limit', 0),
-                    'small_image': track.get('small_image')
-                })
-        elif isinstance(tracks_data, dict) and 'tracks' in tracks_data:
-            for track in tracks_data['tracks']:
-                processed_tracks.append({
-                    'track_id': track.get('track_id'),
-                    'track_name': track.get('track_name'),
-                    'category': track.get('category'),
-                    'config_name': track.get('config_name'),
-                    'logo': track.get('logo'),
-                    'pit_road_speed_limit': track.get('pit_road_speed_limit', 0),
-                    'small_image': track.get('small_image')
-                })
+            # Extract necessary fields from iRacing response
+            processed_tracks = []
+            if is_array:
+                async for track in payload.aiter_items():
+                    processed_tracks.append({
+                        'track_id': track.get('track_id'),
+                        'track_name': track.get('track_name'),
+                        'category': track.get('category'),
+                        'config_name': track.get('config_name'),
+                        'logo': track.get('logo'),
+                        'pit_road_speed_limit': track.get('pit_road_speed_limit', 0),
+                        'small_image': track.get('small_image')
+                    })
+            else:
+                tracks_data = await payload.ajson()
+                if isinstance(tracks_data, dict) and 'tracks' in tracks_data:
+                    for track in tracks_data['tracks']:
+                        processed_tracks.append({
+                            'track_id': track.get('track_id'),
+                            'track_name': track.get('track_name'),
+                            'category': track.get('category'),
+                            'config_name': track.get('config_name'),
+                            'logo': track.get('logo'),
+                            'pit_road_speed_limit': track.get('pit_road_speed_limit', 0),
+                            'small_image': track.get('small_image')
+                        })
         
         # Upsert to database
-        if processed_tracks:
-            upsert_tracks(processed_tracks)
-        
-        return processed_tracks
+        if not processed_tracks:
+            return UpsertSummary()
+        return await upsert_tracks(processed_tracks)
     
     except Exception as e:
         print(f"Error syncing tracks from iRacing API: {str(e)}")
@@ -0,0 +1,154 @@
+"""
+Cache warm-up at startup and on a schedule
+
+Prefetches WARMUP_TARGETS so the first requests after a deploy are cache
+hits instead of paying the iRacing round trips:
+
+    catalog         encoded /events/cars and /events/tracks bodies
+    series          series/seasons
+    special_events  special_events/list
+    schedules       series/schedule for every season in series/seasons
+
+Upstream targets are fetched through cached_call with the stored token of
+WARMUP_USER_ID, at most WARMUP_CONCURRENCY at a time and behind user
+requests for the rate limit. The app reports ready (GET /health/ready)
+once the startup pass has finished, whether or not every target succeeded.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from app.cache.response_cache import CARS, TRACKS, catalog_responses
+from app.config import settings
+from app.db.aio import get_all_cars, get_all_tracks, get_iracing_token_for_user, get_table_versions
+from .endpoints import get_schedule, get_series, get_special_events
+from .ratelimit import background
+
+_MAX_ERRORS = 20
+
+_ready = asyncio.Event()
+_stats = {
+    "runs": 0,
+    "running": False,
+    "total": 0,
+    "done": 0,
+    "failed": 0,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_run_ms": 0.0,
+    "errors": [],
+}
+_task = None
+
+
+async def _step(semaphore: asyncio.Semaphore, name: str, fn: Callable[[], Awaitable]):
+    """Run one warm-up fetch, counting it; returns its result, or None if it failed"""
+    async with semaphore:
+        try:
+            result = await fn()
+        except Exception as e:
+            _stats["failed"] += 1
+            if len(_stats["errors"]) < _MAX_ERRORS:
+                _stats["errors"].append(f"{name}: {e}")
+            return None
+        _stats["done"] += 1
+        return result
+
+
+async def _warm_catalog(table: str, load: Callable[[], Awaitable]):
+    versions = await get_table_versions((table,))
+    return await catalog_responses.get(table, versions[0]["version"], load)
+
+
+@background
+async def run_warmup(targets=settings.WARMUP_TARGETS, user_id=settings.WARMUP_USER_ID,
+                     concurrency: int = settings.WARMUP_CONCURRENCY) -> dict:
+    """One warm-up pass; returns the progress counters"""
+    started = time.perf_counter()
+    _stats.update(running=True, total=0, done=0, failed=0, errors=[],
+                  last_started_at=datetime.utcnow().isoformat())
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def step(name: str, fn: Callable[[], Awaitable]) -> asyncio.Task:
+        # Started right away, so the catalog and special events load while
+        # the series list (which the schedules need) is still in flight
+        _stats["total"] += 1
+        return asyncio.ensure_future(_step(semaphore, name, fn))
+
+    jobs = []
+    try:
+        if "catalog" in targets:
+            jobs.append(step("catalog:cars", lambda: _warm_catalog(CARS, get_all_cars)))
+            jobs.append(step("catalog:tracks", lambda: _warm_catalog(TRACKS, get_all_tracks)))
+
+        token = None
+        if targets & {"series", "special_events", "schedules"}:
+            if user_id is None:
+                _stats["errors"].append("iRacing targets skipped: WARMUP_USER_ID is not set")
+            else:
+                token = await step("token", lambda: get_iracing_token_for_user(user_id))
+
+        if token is not None:
+            if "special_events" in targets:
+                jobs.append(step("special_events", lambda: get_special_events(token, user_id)))
+            if targets & {"series", "schedules"}:
+                series = await step("series", lambda: get_series(token, user_id))
+                if "schedules" in targets and isinstance(series, list):
+                    season_ids = sorted({season["season_id"] for season in series if "season_id" in season})
+                    jobs.extend(
+                        step(f"schedule:{season_id}",
+                             lambda season_id=season_id: get_schedule(season_id, token, user_id))
+                        for season_id in season_ids
+                    )
+
+        await asyncio.gather(*jobs)
+    finally:
+        # Only still pending if the pass was cancelled or failed part way
+        for job in jobs:
+            job.cancel()
+        _stats["running"] = False
+        _stats["runs"] += 1
+        _stats["last_finished_at"] = datetime.utcnow().isoformat()
+        _stats["last_run_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _ready.set()
+    return warmup_stats()
+
+
+async def _warmup_loop(interval: float) -> None:
+    while True:
+        try:
+            await run_warmup()
+        except Exception as e:
+            print(f"Cache warm-up failed: {e}")
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
+
+
+def start_warmup(interval: float = settings.WARMUP_INTERVAL_S) -> None:
+    global _task
+    if not settings.WARMUP_ENABLED:
+        _ready.set()
+        return
+    if _task is None:
+        _task = asyncio.create_task(_warmup_loop(interval))
+
+
+async def stop_warmup() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def warmup_stats() -> dict:
+    return {**_stats, "errors": list(_stats["errors"]), "ready": is_ready()}
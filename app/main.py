@@ -1,17 +1,60 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.cache.db import init_db
-from app.db.events_queries import init_events_db
-from app.db.race_plan_queries import init_race_plan_db
-from app.db.driver_roster_queries import init_driver_roster_db
+from app.cache.db import close_db
+from app.cache.maintenance import start_maintenance, stop_maintenance
+from app.config import settings
+from app.db.executor import shutdown_executor
+from app.db.migrations import migrate, migrate_cache
+from app.iracing.errors import CircuitOpenError, IRacingAPIError
+from app.iracing.http import close_http_clients
+from app.iracing.warmup import start_warmup, stop_warmup
 from app.routers.auth_router import router as auth_router
 from app.routers.iracing_router import router as iracing_router
 from app.routers.events_router import router as events_router
 from app.routers.race_plan_router import router as race_plan_router
 from app.routers.driver_roster_router import router as driver_roster_router
+from app.routers.metrics_router import router as metrics_router
+from app.routers.cache_router import router as cache_router
+from app.routers.health_router import router as health_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_AUTO_MIGRATE:
+        migrate_cache()
+        migrate()
+    start_maintenance()
+    start_warmup()
+    yield
+    await stop_warmup()
+    await stop_maintenance()
+    await close_http_clients()
+    shutdown_executor()
+    close_db()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(IRacingAPIError)
+async def iracing_api_error_handler(request: Request, exc: IRacingAPIError):
+    # iRacing's failure is ours to report as a bad gateway, except rate
+    # limiting and an open circuit breaker, which the client should retry
+    # after the given delay
+    status_code = 503 if exc.status_class == "429" or isinstance(exc, CircuitOpenError) else 502
+    headers = {}
+    if exc.retry_after is not None:
+        headers["Retry-After"] = str(int(exc.retry_after) + 1)
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": exc.message, "upstream_status": exc.status_code},
+        headers=headers,
+    )
 
-app = FastAPI()
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,13 +64,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-init_db()
-init_events_db()
-init_race_plan_db()
-init_driver_roster_db()
-
 app.include_router(auth_router)
 app.include_router(iracing_router)
 app.include_router(events_router)
 app.include_router(race_plan_router)
 app.include_router(driver_roster_router)
+app.include_router(metrics_router)
+app.include_router(cache_router)
+app.include_router(health_router)
@@ -0,0 +1,17 @@
+"""
+Models for cache administration
+"""
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class CacheInvalidationRequest(BaseModel):
+    """Tags such as "user:123", "season:4521", "team:42", "endpoint:series/seasons", and key prefixes"""
+    tags: List[str] = Field(default_factory=list)
+    prefixes: List[str] = Field(default_factory=list)
+
+
+class CacheInvalidationResponse(BaseModel):
+    """Number of entries deleted by tag and by prefix"""
+    deleted_by_tags: int = 0
+    deleted_by_prefixes: int = 0
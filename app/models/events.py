@@ -126,3 +126,14 @@ class EventRegistrationDetail(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UpsertSummary(BaseModel):
+    """Row counts from a bulk upsert of iRacing data"""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
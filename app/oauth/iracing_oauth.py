@@ -1,10 +1,10 @@
 import base64
 import urllib
-import httpx
 from fastapi import HTTPException
 from app.utils.pkce import create_pkce_pair
 from app.utils.masking import mask_client_secret
 from app.config import settings
+from app.iracing.http import http_clients
 
 
 def build_login_redirect():
@@ -33,21 +33,20 @@ async def exchange_code_for_token(code: str, code_verifier: str):
         settings.CLIENT_ID, settings.CLIENT_SECRET)
 
     # Exchange code for access token
-    async with httpx.AsyncClient() as client:
-        token_resp = await client.post(
-            settings.TOKEN_URL,
-            data={
-                "grant_type": "authorization_code",
-                "code": code,
-                "redirect_uri": settings.REDIRECT_URI,
-                "code_verifier": code_verifier,
-                "client_id": settings.CLIENT_ID,
-                "client_secret": masked_secret,
-            },
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-            },
-        )
+    token_resp = await http_clients.post(
+        settings.TOKEN_URL,
+        data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "redirect_uri": settings.REDIRECT_URI,
+            "code_verifier": code_verifier,
+            "client_id": settings.CLIENT_ID,
+            "client_secret": masked_secret,
+        },
+        headers={
+            "Content-Type": "application/x-www-form-urlencoded",
+        },
+    )
 
     if token_resp.status_code != 200:
         print("Token exchange failed:", token_resp.text)
@@ -7,7 +7,7 @@ from jose import jwt
 from app.oauth.iracing_oauth import build_login_redirect, exchange_code_for_token
 from app.config import settings
 from app.iracing.client import iracing_get
-from app.cache.cache import save_iracing_token
+from app.db.aio import save_iracing_token
 
 router = APIRouter()
 
@@ -49,7 +49,7 @@ async def auth_callback(code: str = None, state: str = None):
     expires_at = int(
         (datetime.utcnow() + timedelta(seconds=expires_in)).timestamp())
 
-    save_iracing_token(
+    await save_iracing_token(
         user_id=user_id,
         display_name=display_name,
         access=access_token,
@@ -0,0 +1,35 @@
+"""
+Admin routes for the response cache
+"""
+from fastapi import APIRouter, HTTPException, Request
+
+from app.config import settings
+from app.db.aio import invalidate_cache_prefix, invalidate_cache_tags
+from app.models.cache import CacheInvalidationRequest, CacheInvalidationResponse
+from app.routers.events_router import extract_user_id
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+
+def require_admin(request: Request) -> int:
+    user_id = extract_user_id(request)
+    if user_id not in settings.ADMIN_USER_IDS:
+        raise HTTPException(403, "Admin access required")
+    return user_id
+
+
+@router.post("/invalidate", response_model=CacheInvalidationResponse)
+async def invalidate_cache(body: CacheInvalidationRequest, request: Request):
+    """Drop cached iRacing data by tag and/or key prefix"""
+    require_admin(request)
+    if not body.tags and not body.prefixes:
+        raise HTTPException(400, "Give at least one tag or prefix")
+    if any(not prefix for prefix in body.prefixes):
+        raise HTTPException(400, "Prefixes must not be empty")
+
+    result = CacheInvalidationResponse()
+    if body.tags:
+        result.deleted_by_tags = await invalidate_cache_tags(body.tags)
+    for prefix in body.prefixes:
+        result.deleted_by_prefixes += await invalidate_cache_prefix(prefix)
+    return result
@@ -1,24 +1,26 @@
 """
 Routes for managing Driver Roster
 """
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 
 from app.models.driver_roster import (DriverRoster)
-from app.db.driver_roster_queries import (
+from app.db.aio import (
     create_driver_roster_entry,
     delete_driver_roster_entry,
     list_driver_roster_by_race_plan,
     update_driver_roster_entry,
 )
+from app.utils.conditional import check_table_versions
 
 router = APIRouter(prefix="/driver-roster", tags=["driver-roster"])
 
 @router.get("/list-by-race-plan/{race_plan_id}", response_model=list[DriverRoster])
-async def list_driver_roster_by_race_plan_endpoint(race_plan_id: int):
+async def list_driver_roster_by_race_plan_endpoint(race_plan_id: int, request: Request, response: Response):
     """List all driver roster entries for a specific race plan"""
     
+    await check_table_versions(request, response, ("driver_rosters",))
     try:
-        result = list_driver_roster_by_race_plan(race_plan_id=race_plan_id)
+        result = await list_driver_roster_by_race_plan(race_plan_id=race_plan_id)
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -30,7 +32,7 @@ async def create_driver_roster_entry_endpoint(race_plan_id: int):
     """Create a new driver roster entry"""
     
     try:
-        result = create_driver_roster_entry(race_plan_id=race_plan_id)
+        result = await create_driver_roster_entry(race_plan_id=race_plan_id)
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -42,7 +44,7 @@ async def update_driver_roster_by_race_plan_endpoint(driver_roster: DriverRoster
     """Update driver on driver roster"""
     
     try:
-        result = update_driver_roster_entry(driver_roster=driver_roster)
+        result = await update_driver_roster_entry(driver_roster=driver_roster)
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -53,7 +55,7 @@ async def update_driver_roster_by_race_plan_endpoint(driver_roster: DriverRoster
 async def delete_driver_roster_endpoint(driver_id: int):
     """Delete a driver roster entry"""
     try:
-        result = delete_driver_roster_entry(driver_id=driver_id)
+        result = await delete_driver_roster_entry(driver_id=driver_id)
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -1,29 +1,38 @@
 """
 Routes for managing Events, Cars, Tracks, Teams, and Registrations
 """
-from fastapi import APIRouter, HTTPException, Request
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import List, Optional
+from datetime import date
 
 from app.models.events import (
     EventCreate, EventUpdate, EventResponse, CarDB, TrackDB,
     EventRegistrationCreate, EventRegistrationResponse, EventRegistrationDetail,
     TeamDB
 )
-from app.db.events_queries import (
+from app.db.aio import (
     create_event, get_event_by_id, get_all_events, update_event, delete_event,
-    get_all_cars, get_car_by_id, get_all_tracks, get_track_by_id, init_events_db,
-    upsert_teams, get_all_teams, get_team_by_id, get_team_by_team_id,
+    get_all_cars, get_car_by_id, get_all_tracks, get_track_by_id,
+    get_all_teams, get_team_by_id, get_team_by_team_id,
     register_for_event, get_registration_by_id, get_registrations_for_user,
     get_registrations_for_event, get_registrations_for_event_and_team,
-    cancel_registration, cancel_user_event_registration
+    cancel_registration, cancel_user_event_registration, get_table_versions
 )
+from app.cache.response_cache import CARS, TRACKS, catalog_responses
 from app.iracing.sync import sync_all_iracing_data, sync_cars_from_iracing, sync_tracks_from_iracing
-from app.db.queries import get_iracing_token_for_user
+from app.db.aio import get_iracing_token_for_user
 from app.config import settings
+from app.utils.conditional import (
+    check_not_modified, check_table_versions, table_validators, validator_headers,
+)
 from jose import jwt, JWTError
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+# Tables each kind of response is built from, for ETags and 304s
+_EVENT_TABLES = ("events", "event_time_slots", "event_cars", "tracks", "cars")
+_REGISTRATION_TABLES = ("event_registrations", "teams", "users", *_EVENT_TABLES)
+
 
 def extract_user_id(request: Request):
     """Extract user ID from JWT token in Authorization header"""
@@ -50,11 +59,12 @@ async def sync_cars(request: Request):
     iracing_token = await get_iracing_token_for_user(user_id)
     
     try:
-        cars = await sync_cars_from_iracing(iracing_token)
+        summary = await sync_cars_from_iracing(iracing_token)
         return {
             "status": "success",
-            "cars_synced": len(cars),
-            "message": f"Successfully synced {len(cars)} cars"
+            "cars_synced": summary.total,
+            "cars": summary,
+            "message": f"Successfully synced {summary.total} cars ({summary.inserted} new, {summary.updated} updated)"
         }
     except Exception as e:
         raise HTTPException(500, f"Failed to sync cars: {str(e)}")
@@ -67,11 +77,12 @@ async def sync_tracks(request: Request):
     iracing_token = await get_iracing_token_for_user(user_id)
     
     try:
-        tracks = await sync_tracks_from_iracing(iracing_token)
+        summary = await sync_tracks_from_iracing(iracing_token)
         return {
             "status": "success",
-            "tracks_synced": len(tracks),
-            "message": f"Successfully synced {len(tracks)} tracks"
+            "tracks_synced": summary.total,
+            "tracks": summary,
+            "message": f"Successfully synced {summary.total} tracks ({summary.inserted} new, {summary.updated} updated)"
         }
     except Exception as e:
         raise HTTPException(500, f"Failed to sync tracks: {str(e)}")
@@ -90,26 +101,38 @@ async def sync_all(request: Request):
     
     return {
         "status": "success",
-        "cars_synced": len(result['cars']),
-        "tracks_synced": len(result['tracks']),
-        "message": f"Successfully synced {len(result['cars'])} cars and {len(result['tracks'])} tracks"
+        "cars_synced": result['cars'].total,
+        "tracks_synced": result['tracks'].total,
+        "cars": result['cars'],
+        "tracks": result['tracks'],
+        "message": f"Successfully synced {result['cars'].total} cars and {result['tracks'].total} tracks"
     }
 
 
+async def _catalog_response(request: Request, response: Response, table: str, load):
+    """The pre-encoded body of a catalog table, rebuilt when its table version changes"""
+    versions = await get_table_versions((table,))
+    validators = table_validators(request, versions)
+    check_not_modified(request, response, validators)
+    entry = await catalog_responses.get(table, versions[0]["version"], load)
+    return catalog_responses.response(entry, request, validator_headers(validators))
+
+
 # ===== CARS ENDPOINTS =====
 
 @router.get("/cars", response_model=List[CarDB])
-async def get_cars(request: Request):
+async def get_cars(request: Request, response: Response):
     """Get all cars"""
     extract_user_id(request)  
-    return get_all_cars()
+    return await _catalog_response(request, response, CARS, get_all_cars)
 
 
 @router.get("/cars/{car_id}", response_model=CarDB)
-async def get_car(car_id: int, request: Request):
+async def get_car(car_id: int, request: Request, response: Response):
     """Get a specific car by ID"""
     extract_user_id(request)  
-    car = get_car_by_id(car_id)
+    await check_table_versions(request, response, ("cars",))
+    car = await get_car_by_id(car_id)
     if not car:
         raise HTTPException(404, "Car not found")
     return car
@@ -118,17 +141,18 @@ async def get_car(car_id: int, request: Request):
 # ===== TRACKS ENDPOINTS =====
 
 @router.get("/tracks", response_model=List[TrackDB])
-async def get_tracks(request: Request):
+async def get_tracks(request: Request, response: Response):
     """Get all tracks"""
     extract_user_id(request)  
-    return get_all_tracks()
+    return await _catalog_response(request, response, TRACKS, get_all_tracks)
 
 
 @router.get("/tracks/{track_id}", response_model=TrackDB)
-async def get_track(track_id: int, request: Request):
+async def get_track(track_id: int, request: Request, response: Response):
     """Get a specific track by ID"""
     extract_user_id(request)  
-    track = get_track_by_id(track_id)
+    await check_table_versions(request, response, ("tracks",))
+    track = await get_track_by_id(track_id)
     if not track:
         raise HTTPException(404, "Track not found")
     return track
@@ -142,32 +166,44 @@ async def create_new_event(event: EventCreate, request: Request):
     extract_user_id(request)  
     
     # Validate track exists
-    track = get_track_by_id(event.track_id)
+    track = await get_track_by_id(event.track_id)
     if not track:
         raise HTTPException(400, f"Track with ID {event.track_id} not found")
     
     # Validate all cars exist
     for car_id in event.car_ids:
-        car = get_car_by_id(car_id)
+        car = await get_car_by_id(car_id)
         if not car:
             raise HTTPException(400, f"Car with ID {car_id} not found")
     
-    event_id = create_event(event)
-    return get_event_by_id(event_id)
+    event_id = await create_event(event)
+    return await get_event_by_id(event_id)
 
 
 @router.get("/", response_model=List[EventResponse])
-async def get_events(request: Request):
-    """Get all events"""
+async def get_events(
+    request: Request,
+    response: Response,
+    after: Optional[int] = None,
+    limit: int = Query(settings.EVENTS_PAGE_SIZE, ge=1, le=500),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """
+    Get a page of events, newest first (EVENTS_PAGE_SIZE unless `limit` is
+    given); pass the last event's ID as `after` for the next page
+    """
     extract_user_id(request)  
-    return get_all_events()
+    await check_table_versions(request, response, _EVENT_TABLES)
+    return await get_all_events(after=after, limit=limit, start_date=start_date, end_date=end_date)
 
 
 @router.get("/{event_id}", response_model=EventResponse)
-async def get_event(event_id: int, request: Request):
+async def get_event(event_id: int, request: Request, response: Response):
     """Get a specific event by ID"""
     extract_user_id(request)  
-    event = get_event_by_id(event_id)
+    await check_table_versions(request, response, _EVENT_TABLES)
+    event = await get_event_by_id(event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     return event
@@ -179,24 +215,24 @@ async def update_existing_event(event_id: int, event: EventUpdate, request: Requ
     extract_user_id(request)  
     
     # Check if event exists
-    existing_event = get_event_by_id(event_id)
+    existing_event = await get_event_by_id(event_id)
     if not existing_event:
         raise HTTPException(404, "Event not found")
     
     # Validate track if provided
     if event.track_id is not None:
-        track = get_track_by_id(event.track_id)
+        track = await get_track_by_id(event.track_id)
         if not track:
             raise HTTPException(400, f"Track with ID {event.track_id} not found")
     
     # Validate all cars if provided
     if event.car_ids is not None:
         for car_id in event.car_ids:
-            car = get_car_by_id(car_id)
+            car = await get_car_by_id(car_id)
             if not car:
                 raise HTTPException(400, f"Car with ID {car_id} not found")
     
-    updated_event = update_event(event_id, event)
+    updated_event = await update_event(event_id, event)
     return updated_event
 
 
@@ -206,27 +242,29 @@ async def delete_existing_event(event_id: int, request: Request):
     extract_user_id(request)  
     
     # Check if event exists
-    event = get_event_by_id(event_id)
+    event = await get_event_by_id(event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     
-    delete_event(event_id)
+    await delete_event(event_id)
     return {"message": "Event deleted successfully"}
 
 # ===== TEAMS ENDPOINTS =====
 
 @router.get("/teams", response_model=List[TeamDB])
-async def get_teams(request: Request):
+async def get_teams(request: Request, response: Response):
     """Get all teams"""
     extract_user_id(request)  
-    return get_all_teams()
+    await check_table_versions(request, response, ("teams",))
+    return await get_all_teams()
 
 
 @router.get("/teams/{team_id}", response_model=TeamDB)
-async def get_team(team_id: int, request: Request):
+async def get_team(team_id: int, request: Request, response: Response):
     """Get a specific team by ID"""
     extract_user_id(request)  
-    team = get_team_by_id(team_id)
+    await check_table_versions(request, response, ("teams",))
+    team = await get_team_by_id(team_id)
     if not team:
         raise HTTPException(404, "Team not found")
     return team
@@ -244,7 +282,7 @@ async def register_user_for_event(registration: EventRegistrationCreate, request
         raise HTTPException(403, "Cannot register another user")
     
     try:
-        result = register_for_event(registration)
+        result = await register_for_event(registration)
         return result
     except ValueError as e:
         raise HTTPException(400, str(e))
@@ -253,40 +291,43 @@ async def register_user_for_event(registration: EventRegistrationCreate, request
 
 
 @router.get("/registrations/user", response_model=List[EventRegistrationDetail])
-async def get_user_registrations(request: Request):
+async def get_user_registrations(request: Request, response: Response):
     """Get all event registrations for the current user"""
     user_id = extract_user_id(request)
-    return get_registrations_for_user(user_id)
+    await check_table_versions(request, response, _REGISTRATION_TABLES, user_id)
+    return await get_registrations_for_user(user_id)
 
 
 @router.get("/registrations/event/{event_id}", response_model=List[EventRegistrationDetail])
-async def get_event_registrations(event_id: int, request: Request):
+async def get_event_registrations(event_id: int, request: Request, response: Response):
     """Get all registrations for a specific event"""
     extract_user_id(request)  
+    await check_table_versions(request, response, _REGISTRATION_TABLES)
     
     # Verify event exists
-    event = get_event_by_id(event_id)
+    event = await get_event_by_id(event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     
-    return get_registrations_for_event(event_id)
+    return await get_registrations_for_event(event_id)
 
 
 @router.get("/registrations/event/{event_id}/team/{team_id}", response_model=List[EventRegistrationDetail])
-async def get_event_team_registrations(event_id: int, team_id: int, request: Request):
+async def get_event_team_registrations(event_id: int, team_id: int, request: Request, response: Response):
     """Get all registrations for a specific event and team"""
     extract_user_id(request)  
+    await check_table_versions(request, response, _REGISTRATION_TABLES)
     
     # Verify event and team exist
-    event = get_event_by_id(event_id)
+    event = await get_event_by_id(event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     
-    team = get_team_by_team_id(team_id)
+    team = await get_team_by_team_id(team_id)
     if not team:
         raise HTTPException(404, "Team not found")
     
-    return get_registrations_for_event_and_team(event_id, team_id)
+    return await get_registrations_for_event_and_team(event_id, team_id)
 
 
 @router.delete("/registrations/{registration_id}")
@@ -295,14 +336,14 @@ async def cancel_user_registration(registration_id: int, request: Request):
     user_id = extract_user_id(request)
     
     # Get registration to verify ownership
-    registration = get_registration_by_id(registration_id)
+    registration = await get_registration_by_id(registration_id)
     if not registration:
         raise HTTPException(404, "Registration not found")
     
     if registration.user_id != user_id:
         raise HTTPException(403, "Cannot cancel another user's registration")
     
-    if cancel_registration(registration_id):
+    if await cancel_registration(registration_id):
         return {"message": "Registration cancelled successfully"}
     else:
         raise HTTPException(500, "Failed to cancel registration")
@@ -314,11 +355,11 @@ async def cancel_event_registration(event_id: int, request: Request):
     user_id = extract_user_id(request)
     
     # Verify event exists
-    event = get_event_by_id(event_id)
+    event = await get_event_by_id(event_id)
     if not event:
         raise HTTPException(404, "Event not found")
     
-    if cancel_user_event_registration(user_id, event_id):
+    if await cancel_user_event_registration(user_id, event_id):
         return {"message": "Event registration cancelled successfully"}
     else:
         raise HTTPException(500, "Failed to cancel event registration")
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""
+Routes for load balancer and orchestrator probes
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.iracing.warmup import is_ready, warmup_stats
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def live():
+    """The process is up and serving requests"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """503 until the startup cache warm-up pass has finished"""
+    stats = warmup_stats()
+    body = {"ready": is_ready(), "warmup": {name: stats[name] for name in ("total", "done", "failed", "running")}}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
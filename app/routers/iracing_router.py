@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Request, HTTPException
-from app.iracing.endpoints import get_series, get_schedule, get_special_events, get_teams
+from typing import Optional
+
+from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from app.cache.status import apply_cache_headers, cache_validators
+from app.iracing.endpoints import get_lap_data, get_series, get_schedule, get_special_events, get_teams
 from jose import jwt, JWTError
 from app.config import settings
-from app.db.queries import get_iracing_token_for_user
+from app.db.aio import get_iracing_token_for_user
+from app.utils.conditional import check_not_modified
 
 router = APIRouter()
 
@@ -23,28 +28,52 @@ def extract_user_id(request: Request):
 
 
 @router.get("/series")
-async def series(request: Request):
+async def series(request: Request, response: Response):
     user_id = extract_user_id(request)
     iracing_token = await get_iracing_token_for_user(user_id)
-    return await get_series(iracing_token, user_id)
+    data = await get_series(iracing_token, user_id)
+    apply_cache_headers(response)
+    check_not_modified(request, response, cache_validators())
+    return data
 
 
 @router.get("/series/{season_id}/schedule")
-async def schedule(season_id: int, request: Request):
+async def schedule(season_id: int, request: Request, response: Response):
     user_id = extract_user_id(request)
     iracing_token = await get_iracing_token_for_user(user_id)
-    return await get_schedule(season_id, iracing_token, user_id)
+    data = await get_schedule(season_id, iracing_token, user_id)
+    apply_cache_headers(response)
+    check_not_modified(request, response, cache_validators())
+    return data
 
 
 @router.get("/events/special")
-async def special(request: Request):
+async def special(request: Request, response: Response):
     user_id = extract_user_id(request)
     iracing_token = await get_iracing_token_for_user(user_id)
-    return await get_special_events(iracing_token, user_id)
+    data = await get_special_events(iracing_token, user_id)
+    apply_cache_headers(response)
+    check_not_modified(request, response, cache_validators())
+    return data
 
 
 @router.get("/teams")
-async def teams(request: Request):
+async def teams(request: Request, response: Response):
+    user_id = extract_user_id(request)
+    iracing_token = await get_iracing_token_for_user(user_id)
+    data = await get_teams(iracing_token, user_id)
+    apply_cache_headers(response)
+    check_not_modified(request, response, cache_validators())
+    return data
+
+
+@router.get("/results/{subsession_id}/laps")
+async def lap_data(subsession_id: int, request: Request, simsession_number: int = 0,
+                   cust_id: Optional[int] = None, team_id: Optional[int] = None):
+    if (cust_id is None) == (team_id is None):
+        raise HTTPException(400, "Pass exactly one of cust_id and team_id")
     user_id = extract_user_id(request)
     iracing_token = await get_iracing_token_for_user(user_id)
-    return await get_teams(iracing_token, user_id)
\ No newline at end of file
+    result = await get_lap_data(subsession_id, simsession_number, iracing_token, cust_id, team_id)
+    # Rows are sent as the chunks arrive instead of being collected first
+    return StreamingResponse(result.iter_json(), media_type="application/json")
@@ -0,0 +1,40 @@
+"""
+Routes for runtime metrics
+"""
+from fastapi import APIRouter, Request
+
+from app.cache.cache import memory_cache
+from app.cache.db import cache_pool_stats, cache_writer_stats, pool_stats, writer_stats
+from app.cache.maintenance import maintenance_stats
+from app.cache.response_cache import catalog_responses
+from app.db.executor import executor_stats
+from app.iracing.endpoints import upstream_backoff, upstream_flights
+from app.iracing.http import http_clients
+from app.iracing.ratelimit import rate_limiter
+from app.iracing.resilience import resilience
+from app.iracing.warmup import warmup_stats
+from app.routers.events_router import extract_user_id
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/")
+async def get_metrics(request: Request):
+    """Get database pool, writer, executor and cache statistics"""
+    extract_user_id(request)
+    return {
+        "db_pool": pool_stats(),
+        "db_writer": writer_stats(),
+        "cache_db_pool": cache_pool_stats(),
+        "cache_db_writer": cache_writer_stats(),
+        "cache_memory": memory_cache.stats(),
+        "cache_maintenance": maintenance_stats(),
+        "catalog_responses": catalog_responses.stats(),
+        "iracing_single_flight": upstream_flights.stats(),
+        "iracing_backoff": upstream_backoff.stats(),
+        "iracing_http": http_clients.stats(),
+        "iracing_rate_limit": rate_limiter.stats(),
+        "iracing_resilience": resilience.stats(),
+        "cache_warmup": warmup_stats(),
+        "db_executor": executor_stats(),
+    }
@@ -0,0 +1,105 @@
+"""
+Conditional GET support: ETag / If-None-Match and Last-Modified / If-Modified-Since
+
+Routes call check_not_modified() before loading anything. For database
+routes the validators come from get_table_versions() (one small read), so
+an unchanged resource costs that read and a 304, with no row hydration.
+"""
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from app.cache.response_cache import GZIP_SUFFIX, gzip_etag
+from app.db.aio import get_table_versions
+
+Validators = namedtuple("Validators", ["etag", "last_modified"])
+
+# Headers of the route's response that a 304 must not copy: they describe
+# the empty placeholder body, or are replaced by the current validators
+_NOT_ON_304 = {"content-length", "content-type", "etag", "last-modified"}
+
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def _normalize(tag: str) -> str:
+    # If-None-Match uses weak comparison, and the gzip copy of a body
+    # represents the same content as the identity one
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    if tag.endswith(GZIP_SUFFIX + '"'):
+        tag = tag[:-len(GZIP_SUFFIX) - 1] + '"'
+    return tag
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        # Takes precedence over If-Modified-Since when both are sent
+        if if_none_match.strip() == "*":
+            return True
+        etag = _normalize(validators.etag)
+        return any(_normalize(tag) == etag for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and validators.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return validators.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def validator_headers(validators: Validators) -> dict:
+    headers = {"ETag": validators.etag}
+    if validators.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    return headers
+
+
+def check_not_modified(request: Request, response: Response, validators: Optional[Validators]) -> None:
+    """Set validators on response, or raise a 304 when the client's copy is current"""
+    if validators is None:
+        return
+    headers = validator_headers(validators)
+    if is_not_modified(request, validators):
+        # Keep what the route already set (X-Cache, Age, Warning); the
+        # raised 304 would otherwise go out with the validators alone
+        headers = {**{name: value for name, value in response.headers.items()
+                      if name.lower() not in _NOT_ON_304},
+                   **headers}
+        # Echo the gzip variant's tag when that is the copy the client holds
+        tagged = gzip_etag(validators.etag)
+        if tagged in request.headers.get("If-None-Match", ""):
+            headers["ETag"] = tagged
+        raise HTTPException(304, headers=headers)
+    response.headers.update(headers)
+
+
+def table_validators(request: Request, versions, *vary) -> Validators:
+    """
+    Validators for a response built from the tables in versions, the rows
+    of get_table_versions(). vary adds anything else the body depends on
+    besides the URL, such as the requesting user.
+    """
+    last_modified = None
+    if versions:
+        changed_at = max(row["changed_at"] for row in versions)
+        last_modified = datetime.fromisoformat(changed_at).replace(tzinfo=timezone.utc)
+    etag = make_etag(request.url.path, request.url.query, vary,
+                     sorted((row["name"], row["version"]) for row in versions))
+    return Validators(etag, last_modified)
+
+
+async def check_table_versions(request: Request, response: Response, tables: Iterable[str], *vary) -> Validators:
+    """check_not_modified() with validators for a response built from tables"""
+    validators = table_validators(request, await get_table_versions(tables), *vary)
+    check_not_modified(request, response, validators)
+    return validators
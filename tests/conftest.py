@@ -0,0 +1,46 @@
+"""
+Shared test setup: the app runs against throwaway databases in a temp dir.
+
+Settings are read at import time, so the environment is set before any
+app module is imported.
+"""
+import json
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="iracing-tests-")
+os.environ["DB_PATH"] = os.path.join(_TMP, "app.db")
+os.environ["CACHE_DB_PATH"] = os.path.join(_TMP, "cache.db")
+os.environ["WARMUP_ENABLED"] = "false"
+os.environ["SECRET_KEY"] = "test-secret"
+
+from app.db.migrations import migrate, migrate_cache  # noqa: E402
+
+migrate_cache()
+migrate()
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.config import settings  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager, so warm-up and maintenance don't start
+    from app.main import app
+    return TestClient(app)
+
+
+def auth_headers(user_id: int) -> dict:
+    token = jwt.encode({"user_id": user_id}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def spooled(data):
+    """A SpooledPayload holding data as JSON, as iracing_stream yields it"""
+    from app.iracing.streaming import SpooledPayload
+    payload = SpooledPayload()
+    payload.write(json.dumps(data).encode())
+    return payload
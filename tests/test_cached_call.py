@@ -0,0 +1,197 @@
+import asyncio
+import itertools
+import sqlite3
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.cache import cache
+from app.cache.cache import get_persisted_cache_entry, memory_cache, set_cache
+from app.cache.memory import MISS
+from app.cache.scopes import CacheScope, scoped_key
+from app.db.aio import get_cache
+from app.iracing import endpoints
+from app.iracing.errors import IRacingAPIError
+
+from .conftest import spooled
+
+_keys = itertools.count()
+
+URL = "https://members-ng.iracing.com/data/series/seasons"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """iracing_stream replaced by a fake: "expired" gets a 401, other tokens succeed"""
+    calls = []
+
+    @asynccontextmanager
+    async def fake_stream(url, token):
+        calls.append(token)
+        await asyncio.sleep(0.01)
+        if token == "expired":
+            raise IRacingAPIError("Unauthorized", status_code=401, url=url)
+        with spooled({"token": token}) as payload:
+            yield payload
+
+    monkeypatch.setattr(endpoints, "iracing_stream", fake_stream)
+    monkeypatch.setattr(endpoints, "upstream_backoff", endpoints.UpstreamBackoff())
+    return calls
+
+
+def _key() -> str:
+    return f"test_{next(_keys)}"
+
+
+def test_global_key_is_shared_between_users(upstream):
+    key = _key()
+
+    async def run():
+        first = await endpoints.cached_call(key, URL, "token-a", "1", scope=CacheScope.GLOBAL)
+        second = await endpoints.cached_call(key, URL, "token-b", "2", scope=CacheScope.GLOBAL)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == {"token": "token-a"}
+    assert upstream == ["token-a"]
+
+
+def test_user_key_is_not_shared(upstream):
+    key = _key()
+
+    async def run():
+        return (await endpoints.cached_call(key, URL, "token-a", "1", scope=CacheScope.USER),
+                await endpoints.cached_call(key, URL, "token-b", "2", scope=CacheScope.USER))
+
+    assert asyncio.run(run()) == ({"token": "token-a"}, {"token": "token-b"})
+
+
+def test_expired_token_does_not_block_other_users(upstream):
+    key = _key()
+
+    async def run():
+        with pytest.raises(IRacingAPIError):
+            await endpoints.cached_call(key, URL, "expired", "1", scope=CacheScope.GLOBAL)
+        return await endpoints.cached_call(key, URL, "token-b", "2", scope=CacheScope.GLOBAL)
+
+    assert asyncio.run(run()) == {"token": "token-b"}
+
+
+def test_expired_token_backs_off_only_its_user(upstream):
+    key = _key()
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(IRacingAPIError) as error:
+                await endpoints.cached_call(key, URL, "expired", "1", scope=CacheScope.GLOBAL)
+        return error.value
+
+    error = asyncio.run(run())
+    # The second call fails from the backoff without going upstream
+    assert upstream == ["expired"]
+    assert error.status_code == 401
+
+
+def test_waiter_retries_with_own_token_after_shared_401(upstream):
+    key = _key()
+
+    async def run():
+        return await asyncio.gather(
+            endpoints.cached_call(key, URL, "expired", "1", scope=CacheScope.GLOBAL),
+            endpoints.cached_call(key, URL, "token-b", "2", scope=CacheScope.GLOBAL),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(run())
+    assert isinstance(first, IRacingAPIError) and first.status_code == 401
+    assert second == {"token": "token-b"}
+
+
+def test_team_key_is_shared_within_the_team(upstream):
+    key = _key()
+
+    async def run():
+        return (await endpoints.cached_call(key, URL, "token-a", "1", scope=CacheScope.TEAM, team_id=7),
+                await endpoints.cached_call(key, URL, "token-b", "2", scope=CacheScope.TEAM, team_id=7),
+                await endpoints.cached_call(key, URL, "token-c", "3", scope=CacheScope.TEAM, team_id=8))
+
+    assert asyncio.run(run()) == ({"token": "token-a"}, {"token": "token-a"}, {"token": "token-c"})
+    assert upstream == ["token-a", "token-c"]
+
+
+def test_concurrent_misses_share_one_fetch(upstream):
+    key = _key()
+
+    async def run():
+        return await asyncio.gather(*(
+            endpoints.cached_call(key, URL, f"token-{n}", str(n), scope=CacheScope.GLOBAL) for n in range(5)
+        ))
+
+    results = asyncio.run(run())
+    assert len(upstream) == 1
+    assert results == [{"token": upstream[0]}] * 5
+
+
+# A soft TTL this short has run out by the next call
+_EXPIRED_TTL_HOURS = 1e-9
+
+
+def test_stale_entry_is_served_while_it_is_refreshed(upstream):
+    key = _key()
+
+    async def call(token):
+        return await endpoints.cached_call(key, URL, token, "1", scope=CacheScope.GLOBAL,
+                                           ttl_hours=_EXPIRED_TTL_HOURS, hard_ttl_hours=1)
+
+    async def run():
+        first = await call("token-a")
+        stale = await call("token-b")
+        # Let the background refresh finish
+        await asyncio.sleep(0.05)
+        refreshed = await get_cache(scoped_key(key, CacheScope.GLOBAL))
+        return first, stale, refreshed
+
+    first, stale, refreshed = asyncio.run(run())
+    assert first == stale == {"token": "token-a"}
+    assert refreshed == {"token": "token-b"}
+    assert upstream == ["token-a", "token-b"]
+
+
+def test_last_good_value_is_served_when_upstream_fails(upstream):
+    key = _key()
+
+    async def call(token):
+        return await endpoints.cached_call(key, URL, token, "1", scope=CacheScope.GLOBAL,
+                                           ttl_hours=_EXPIRED_TTL_HOURS, hard_ttl_hours=_EXPIRED_TTL_HOURS)
+
+    async def run():
+        return await call("token-a"), await call("expired")
+
+    assert asyncio.run(run()) == ({"token": "token-a"}, {"token": "token-a"})
+    assert upstream == ["token-a", "expired"]
+
+
+def test_spooled_body_is_stored_as_downloaded(upstream):
+    key = _key()
+    cache_key = scoped_key(key, CacheScope.GLOBAL)
+
+    asyncio.run(endpoints.cached_call(key, URL, "token-a", "1", scope=CacheScope.GLOBAL))
+    in_memory = memory_cache.get(cache_key)
+    memory_cache.delete(cache_key)
+    persisted = get_persisted_cache_entry(cache_key)
+
+    assert persisted.value == in_memory.value == {"token": "token-a"}
+    assert persisted.etag == in_memory.etag
+
+
+def test_failed_write_is_not_served_from_memory(monkeypatch):
+    key = _key()
+
+    def failing_write(write):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "run_cache_write", failing_write)
+    with pytest.raises(sqlite3.OperationalError):
+        set_cache(key, {"value": 1}, 1, tags=["user:1"])
+
+    assert memory_cache.get(key) is MISS
@@ -0,0 +1,37 @@
+import sqlite3
+
+from app.cache.db import DB_PATH
+from app.db.events_queries import upsert_cars
+
+from .conftest import auth_headers
+
+
+def _other_process_renames(car_id: int, name: str) -> None:
+    # A separate connection, as another worker process would write
+    db = sqlite3.connect(DB_PATH)
+    db.execute("UPDATE cars SET car_name = ?, content_hash = NULL WHERE car_id = ?", (name, car_id))
+    db.commit()
+    db.close()
+
+
+def test_cars_body_is_rebuilt_when_another_process_changes_the_table(client):
+    upsert_cars([{"car_id": 9001, "car_name": "Before", "logo": "logo.png", "tank_size": 50}])
+    first = client.get("/events/cars", headers=auth_headers(1))
+    assert first.status_code == 200
+    assert "Before" in {car["car_name"] for car in first.json()}
+
+    _other_process_renames(9001, "After")
+
+    second = client.get("/events/cars", headers=auth_headers(1))
+    assert second.status_code == 200
+    names = {car["car_name"] for car in second.json()}
+    assert "After" in names and "Before" not in names
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_unchanged_cars_body_is_served_from_the_cache(client):
+    from app.cache.response_cache import catalog_responses
+    client.get("/events/cars", headers=auth_headers(1))
+    hits = catalog_responses.stats()["hits"]
+    client.get("/events/cars", headers=auth_headers(1))
+    assert catalog_responses.stats()["hits"] == hits + 1
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from app.iracing import chunks
+from app.iracing.errors import IRacingAPIError
+from app.iracing.streaming import SpooledPayload
+from app.routers import iracing_router
+
+from .conftest import auth_headers
+
+BASE = "https://scorpio-assets.s3.amazonaws.com/chunks/"
+
+
+def _chunk_payload(rows, row_count=None):
+    names = [f"chunk_{i}.json" for i in range(len(rows))]
+    return {"chunk_info": {"rows": sum(map(len, rows)) if row_count is None else row_count,
+                           "base_download_url": BASE, "chunk_file_names": names}}
+
+
+@pytest.fixture
+def chunk_files(monkeypatch):
+    """download_to_spool replaced by a fake; later chunks finish first"""
+    state = {"rows": [], "completed": [], "in_flight": 0, "max_in_flight": 0}
+
+    async def fake_download(signed_url, url):
+        index = int(signed_url[len(BASE) + len("chunk_"):-len(".json")])
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.01 * (len(state["rows"]) - index))
+        finally:
+            state["in_flight"] -= 1
+        state["completed"].append(index)
+        payload = SpooledPayload()
+        payload.write(json.dumps(state["rows"][index]).encode())
+        return payload
+
+    monkeypatch.setattr(chunks, "download_to_spool", fake_download)
+    return state
+
+
+def test_out_of_order_chunks_are_merged_in_order(chunk_files):
+    rows = [[{"lap": chunk * 10 + i} for i in range(3)] for chunk in range(5)]
+    chunk_files["rows"] = rows
+
+    async def run():
+        result = chunks.ChunkedResult(chunks.LAP_DATA_URL, _chunk_payload(rows), concurrency=5)
+        return [row async for row in result.iter_rows()]
+
+    merged = asyncio.run(run())
+    assert chunk_files["completed"] == [4, 3, 2, 1, 0]
+    assert merged == [row for chunk in rows for row in chunk]
+
+
+def test_downloads_stay_within_concurrency(chunk_files):
+    rows = [[{"lap": chunk}] for chunk in range(8)]
+    chunk_files["rows"] = rows
+
+    async def run():
+        result = chunks.ChunkedResult(chunks.LAP_DATA_URL, _chunk_payload(rows), concurrency=3)
+        return [row async for row in result.iter_rows()]
+
+    assert asyncio.run(run()) == [{"lap": chunk} for chunk in range(8)]
+    assert chunk_files["max_in_flight"] <= 3
+
+
+def test_row_count_mismatch_raises(chunk_files):
+    rows = [[{"lap": 1}], [{"lap": 2}]]
+    chunk_files["rows"] = rows
+
+    async def run():
+        result = chunks.ChunkedResult(chunks.LAP_DATA_URL, _chunk_payload(rows, row_count=3))
+        return [row async for row in result.iter_rows()]
+
+    with pytest.raises(IRacingAPIError):
+        asyncio.run(run())
+
+
+def test_lap_data_route_streams_merged_rows(chunk_files, monkeypatch, client):
+    rows = [[{"lap": 1}, {"lap": 2}], [{"lap": 3}], [{"lap": 4}, {"lap": 5}]]
+    chunk_files["rows"] = rows
+    requested = []
+
+    async def fake_get(url, token):
+        requested.append(url)
+        return _chunk_payload(rows)
+
+    async def fake_token(user_id):
+        return "token"
+
+    monkeypatch.setattr(chunks, "iracing_get", fake_get)
+    monkeypatch.setattr(iracing_router, "get_iracing_token_for_user", fake_token)
+
+    resp = client.get("/results/123/laps?cust_id=42", headers=auth_headers(1))
+
+    assert resp.status_code == 200
+    assert resp.json() == [{"lap": lap} for lap in range(1, 6)]
+    assert requested == [f"{chunks.LAP_DATA_URL}?subsession_id=123&simsession_number=0&cust_id=42"]
@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.cache.db import READ_PRAGMAS, WRITE_PRAGMAS, ConnectionPool, WriteQueue, open_connection
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "db.db")
+    db = open_connection(path, WRITE_PRAGMAS)
+    db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL)")
+    db.commit()
+    db.close()
+    return path
+
+
+@pytest.fixture
+def writer(path):
+    writer = WriteQueue(path, WRITE_PRAGMAS, max_batch=64, max_delay_ms=5)
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def pool(path):
+    pool = ConnectionPool(path, size=1, timeout=1, pragmas=READ_PRAGMAS)
+    yield pool
+    pool.close()
+
+
+def _insert(name):
+    return lambda db: db.execute("INSERT INTO items (name) VALUES (?)", (name,)).lastrowid
+
+
+def test_concurrent_writers_all_commit(writer, pool):
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                writer.execute(_insert(f"{n}-{i}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with pool.connection() as db:
+        assert db.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 160
+    stats = writer.stats()
+    assert stats["writes"] == 160 and stats["failed"] == 0
+    assert stats["batches"] <= stats["writes"]
+
+
+def test_failed_write_only_rolls_back_itself(writer, pool):
+    writer.execute(_insert("taken"))
+    good = writer.submit(_insert("fresh"))
+    bad = writer.submit(_insert("taken"))
+
+    assert good.result() > 0
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result()
+    with pool.connection() as db:
+        assert {row[0] for row in db.execute("SELECT name FROM items")} == {"taken", "fresh"}
+
+
+def test_write_inside_a_write_joins_its_transaction(writer, pool):
+    def outer(db):
+        first = db.execute("INSERT INTO items (name) VALUES ('outer')").lastrowid
+        return first, writer.execute(_insert("inner"))
+
+    first, second = writer.execute(outer)
+    assert second == first + 1
+
+
+def test_nested_reads_reuse_the_thread_connection(pool):
+    # A pool of one would time out if the inner block checked out another connection
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+            inner.execute("SELECT 1").fetchone()
+        assert pool.stats()["in_use"] == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_read_connections_reject_writes(pool):
+    with pool.connection() as db:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            db.execute("INSERT INTO items (name) VALUES ('nope')")
+
+
+def test_pool_times_out_when_every_connection_is_held(pool):
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="Timed out"):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        thread.join()
+    assert pool.stats()["timeouts"] == 1
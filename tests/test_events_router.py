@@ -0,0 +1,31 @@
+from app.cache.db import run_write
+from app.config import settings
+
+from .conftest import auth_headers
+
+
+def _add_events(count: int) -> None:
+    def write(db):
+        track = db.execute("""
+            INSERT INTO tracks (track_id, track_name, category, config_name, logo, pit_road_speed_limit, small_image)
+            VALUES (9901, 'Spa', 'road', 'Endurance', 'spa.png', 60, 'spa-small.png')
+        """).lastrowid
+        db.executemany("""
+            INSERT INTO events (event_name, event_description, start_date, end_date, duration_minutes, track_id)
+            VALUES (?, '', '2026-11-01', '2026-11-02', 60, ?)
+        """, [(f"Event {n}", track) for n in range(count)])
+    run_write(write)
+
+
+def test_listing_without_limit_returns_one_page(client):
+    _add_events(settings.EVENTS_PAGE_SIZE + 5)
+
+    first = client.get("/events/", headers=auth_headers(901))
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page) == settings.EVENTS_PAGE_SIZE
+
+    # The next page starts after the last event of this one
+    rest = client.get("/events/", params={"after": page[-1]["id"]}, headers=auth_headers(901))
+    assert rest.status_code == 200
+    assert not {event["id"] for event in page} & {event["id"] for event in rest.json()}
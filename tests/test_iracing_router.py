@@ -0,0 +1,37 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.iracing import endpoints
+from app.routers import iracing_router
+
+from .conftest import auth_headers, spooled
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    @asynccontextmanager
+    async def fake_stream(url, token):
+        with spooled([{"season_id": 1, "url": url}]) as payload:
+            yield payload
+
+    async def fake_token(user_id):
+        return "token"
+
+    monkeypatch.setattr(endpoints, "iracing_stream", fake_stream)
+    monkeypatch.setattr(endpoints, "upstream_backoff", endpoints.UpstreamBackoff())
+    monkeypatch.setattr(iracing_router, "get_iracing_token_for_user", fake_token)
+
+
+def test_not_modified_keeps_cache_status_headers(upstream, client):
+    first = client.get("/series/9101/schedule", headers=auth_headers(1))
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+
+    revalidated = client.get("/series/9101/schedule",
+                             headers={**auth_headers(1), "If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["X-Cache"] == "HIT"
+    assert "Age" in revalidated.headers
+    assert revalidated.headers["ETag"] == first.headers["ETag"]
+    assert revalidated.headers.get("content-length", "0") == "0"
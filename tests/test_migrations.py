@@ -0,0 +1,99 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+from app.cache.db import CACHE_DB_PATH, CACHE_PRAGMAS, open_connection
+from app.db.migrations import CACHE_MIGRATIONS, MIGRATIONS, current_version, migrate, migrate_cache
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _journal_mode(path: str) -> str:
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        db.close()
+
+
+def _legacy_app_db(path: str) -> None:
+    """
+    An application database from before the cache moved out (version 2,
+    with cache rows), still in rollback-journal mode
+    """
+    migrate(path, migrations=MIGRATIONS[:2], pragmas={})
+    db = sqlite3.connect(path)
+    expires = (datetime.utcnow() + timedelta(days=3)).isoformat()
+    db.executemany("INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                   [("42_series", "[1]", expires), ("42_teams", "[2]", expires)])
+    db.commit()
+    db.close()
+
+
+def test_dry_run_leaves_both_databases_untouched(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    _legacy_app_db(path)
+    app_before, cache_before = _read(path), _read(CACHE_DB_PATH)
+
+    assert _journal_mode(path) == "delete"
+
+    ran = migrate(path, dry_run=True)
+
+    assert ran == MIGRATIONS[2:]
+    assert _read(path) == app_before
+    assert _read(CACHE_DB_PATH) == cache_before
+    assert not os.path.exists(path + "-wal")
+    assert _journal_mode(path) == "delete"
+    db = sqlite3.connect(path)
+    assert current_version(db) == 2
+    db.close()
+
+
+def test_cache_dry_run_keeps_journal_mode_and_page_size(tmp_path):
+    path = str(tmp_path / "cache.db")
+    migrate(path, migrations=CACHE_MIGRATIONS[:1], pragmas={})
+    before = _read(path)
+
+    migrate_cache(path, dry_run=True)
+
+    assert _read(path) == before
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert db.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    assert current_version(db) == 1
+    db.close()
+
+
+def test_rows_copied_by_0003_are_shared_and_tagged(tmp_path):
+    app_path, cache_path = str(tmp_path / "legacy.db"), str(tmp_path / "cache.db")
+    _legacy_app_db(app_path)
+    migrate_cache(cache_path)
+    soon = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    cache_db = open_connection(cache_path, CACHE_PRAGMAS)
+    # As set_cache writes it
+    cache_db.execute("""
+        INSERT INTO cache (key, value, stored_at, expires_at, last_access, size)
+        VALUES ('global_series', '[0]', ?, ?, strftime('%s', 'now'), 3)
+    """, (datetime.utcnow().isoformat(), soon))
+    cache_db.commit()
+
+    # What 0003 does once the cache database is already up to date
+    rows = [("42_series", "[1]", (datetime.utcnow() + timedelta(days=3)).isoformat()),
+            ("42_schedule_7", "[3]", soon),
+            ("42_teams", "[2]", soon)]
+    cache_db.executemany("INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", rows)
+    cache_db.commit()
+
+    stored = {row["key"]: row for row in cache_db.execute("SELECT * FROM cache")}
+    tags = {tuple(row) for row in cache_db.execute("SELECT tag, key FROM cache_tags")}
+    cache_db.close()
+
+    assert set(stored) == {"global_series", "global_schedule_7", "42_teams"}
+    # The copy expiring last wins
+    assert stored["global_series"]["value"] == "[1]"
+    assert all(row["stored_at"] and row["size"] is not None and row["last_access"] for row in stored.values())
+    assert ("user:42", "42_teams") in tags
+    assert ("season:7", "global_schedule_7") in tags
@@ -0,0 +1,37 @@
+import pytest
+
+from app.cache.scopes import CacheScope
+from app.iracing.policies import OVERRIDES, POLICIES, policy_for
+
+DATA = "https://members-ng.iracing.com/data/"
+
+
+@pytest.mark.parametrize("path", [
+    "stats/member_summary",
+    "stats/member_division",
+    "league/cust_league_sessions",
+    "hosted/combined_sessions",
+    "hosted/sessions",
+    "member/info",
+    "team/membership",
+    "not/documented",
+])
+def test_personal_paths_are_cached_per_user(path):
+    assert policy_for(f"{DATA}{path}?cust_id=1").scope == CacheScope.USER
+
+
+@pytest.mark.parametrize("path", [
+    "series/seasons",
+    "series/schedule",
+    "car/get",
+    "track/get",
+    "constants/divisions",
+    "lookup/licenses",
+])
+def test_catalog_paths_are_shared(path):
+    assert policy_for(f"{DATA}{path}").scope == CacheScope.GLOBAL
+
+
+def test_only_overridden_paths_are_shared():
+    shared = {path for path, policy in POLICIES.items() if policy.scope == CacheScope.GLOBAL}
+    assert shared == {path for path, fields in OVERRIDES.items() if fields.get("scope") == CacheScope.GLOBAL}
@@ -0,0 +1,45 @@
+import pytest
+
+from app.cache.db import APP_PRAGMAS, CACHE_PRAGMAS, open_connection
+from app.db.migrations import migrate, migrate_cache
+from app.db.query_plans import CACHE_HOT_QUERIES, HOT_QUERIES, check_query_plans
+
+
+@pytest.fixture
+def app_db(tmp_path):
+    path = str(tmp_path / "plans.db")
+    migrate(path)
+    db = open_connection(path, APP_PRAGMAS)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def cache_db(tmp_path):
+    path = str(tmp_path / "plans-cache.db")
+    migrate_cache(path)
+    db = open_connection(path, CACHE_PRAGMAS)
+    yield db
+    db.close()
+
+
+def test_hot_queries_use_indexes(app_db):
+    assert check_query_plans(app_db, HOT_QUERIES) == []
+
+
+def test_cache_hot_queries_use_indexes(cache_db):
+    assert check_query_plans(cache_db, CACHE_HOT_QUERIES) == []
+
+
+def test_temp_b_tree_sort_and_uncovered_reads_are_reported(app_db):
+    # Without the (event_id, registered_at, ...) index the registrations of
+    # an event are sorted in a temp b-tree; a narrow race plan index is not covering
+    app_db.execute("PRAGMA query_only=OFF")
+    app_db.execute("DROP INDEX idx_event_registrations_event")
+    app_db.execute("DROP INDEX idx_race_plans_team_event")
+    app_db.execute("CREATE INDEX idx_race_plans_team_event ON race_plans (team_id, event_id)")
+
+    failures = check_query_plans(app_db, HOT_QUERIES)
+
+    assert "registrations for event: USE TEMP B-TREE FOR ORDER BY" in failures
+    assert any(f.startswith("race plan by team and event: not covered") for f in failures)
@@ -0,0 +1,49 @@
+from app.cache.db import get_db, run_write
+
+TEAM_ID = 701
+EVENT_ID = 702
+
+
+def _register(user_id: int) -> None:
+    def write(db):
+        db.execute("INSERT OR IGNORE INTO users (user_id, display_name) VALUES (?, ?)", (user_id, f"Driver {user_id}"))
+        db.execute("""
+            INSERT INTO event_registrations (event_id, user_id, team_id, time_slot, car_id)
+            VALUES (?, ?, ?, '2026-11-01T18:00:00', 1)
+        """, (EVENT_ID, user_id, TEAM_ID))
+    run_write(write)
+
+
+def _roster_user_ids(plan_id: int) -> list:
+    with get_db() as db:
+        return [row[0] for row in db.execute(
+            "SELECT user_id FROM driver_rosters WHERE race_plan_id = ? ORDER BY user_id", (plan_id,))]
+
+
+def test_etag_covers_the_roster_rows_the_get_adds(client):
+    run_write(lambda db: db.execute(
+        "INSERT INTO race_plans (team_id, car_id, event_id, time_slot) VALUES (?, 1, ?, '2026-11-01T18:00:00')",
+        (TEAM_ID, EVENT_ID)))
+    url = f"/race-plan/list/team/{TEAM_ID}/event/{EVENT_ID}"
+    _register(801)
+
+    # The first GET adds driver 801 to the roster
+    first = client.get(url)
+    assert first.status_code == 200
+    plan_id = first.json()["id"]
+    assert _roster_user_ids(plan_id) == [801]
+
+    # Its ETag already covers that write
+    cached = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+
+    # A new registration changes the validators; the GET adds the driver...
+    _register(802)
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert _roster_user_ids(plan_id) == [801, 802]
+
+    # ...and sends the ETag of the roster it left behind
+    again = client.get(url, headers={"If-None-Match": changed.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.iracing.ratelimit import BACKGROUND, INTERACTIVE, RateLimitScheduler, background_priority, current_priority
+
+URL = "https://members-ng.iracing.com/data/series/seasons"
+
+
+def _response(remaining: int, reset_in: float) -> httpx.Response:
+    return httpx.Response(200, headers={
+        "x-ratelimit-limit": "240",
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(time.time() + reset_in),
+    }, request=httpx.Request("GET", URL))
+
+
+def test_interactive_waiters_go_before_background_ones():
+    # One token, refilled every 10ms
+    scheduler = RateLimitScheduler(limit=100, window_s=1, burst=1, reserve=0)
+    order = []
+
+    async def call(name, priority):
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    async def run():
+        await scheduler.acquire(INTERACTIVE)
+        # Queued first, but lower priority
+        queued = [asyncio.ensure_future(call(f"background-{n}", BACKGROUND)) for n in range(2)]
+        await asyncio.sleep(0)
+        queued += [asyncio.ensure_future(call(f"interactive-{n}", INTERACTIVE)) for n in range(2)]
+        await asyncio.gather(*queued)
+
+    asyncio.run(run())
+    assert order == ["interactive-0", "interactive-1", "background-0", "background-1"]
+
+
+def test_background_calls_leave_the_reserve_to_interactive_ones():
+    scheduler = RateLimitScheduler(limit=240, window_s=60, burst=10, reserve=2)
+    scheduler.update(_response(remaining=2, reset_in=30))
+
+    async def run():
+        await asyncio.wait_for(scheduler.acquire(INTERACTIVE), 0.1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.acquire(BACKGROUND), 0.1)
+
+    asyncio.run(run())
+    assert scheduler.remaining == 1
+    assert scheduler.stats()["priorities"]["background"]["queued"] == 1
+
+
+def test_nothing_waits_while_quota_and_tokens_last():
+    scheduler = RateLimitScheduler(limit=240, window_s=60, burst=5, reserve=2)
+    scheduler.update(_response(remaining=100, reset_in=30))
+
+    async def run():
+        for _ in range(5):
+            await asyncio.wait_for(scheduler.acquire(BACKGROUND), 0.01)
+
+    asyncio.run(run())
+    assert scheduler.remaining == 95
+    assert scheduler.stats()["priorities"]["background"]["queued"] == 0
+
+
+def test_background_priority_applies_inside_the_block():
+    assert current_priority() == INTERACTIVE
+    with background_priority():
+        assert current_priority() == BACKGROUND
+    assert current_priority() == INTERACTIVE
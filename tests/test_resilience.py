@@ -0,0 +1,106 @@
+import pytest
+
+from app.iracing.errors import CircuitOpenError
+from app.iracing.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+URL = "https://members-ng.iracing.com/data/series/seasons"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, open_seconds=30, clock=clock)
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(breaker.before_call(URL))
+
+
+def test_consecutive_failures_open_the_breaker(breaker):
+    breaker.record_failure(breaker.before_call(URL))
+    breaker.record_failure(breaker.before_call(URL))
+    breaker.record_success(breaker.before_call(URL))
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+    _open(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(URL)
+    assert breaker.counters == {"opened": 1, "rejected": 1}
+
+
+def test_successful_probe_closes(breaker, clock):
+    _open(breaker)
+    clock.now += 30
+    probe = breaker.before_call(URL)
+    assert probe.probe and breaker.state == HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(URL)
+
+    breaker.record_success(probe)
+    assert breaker.state == CLOSED
+    assert not breaker.before_call(URL).probe
+
+
+def test_failed_probe_reopens_for_another_period(breaker, clock):
+    _open(breaker)
+    clock.now += 30
+    breaker.record_failure(breaker.before_call(URL))
+    assert breaker.state == OPEN and breaker.opened_at == clock.now
+
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(URL)
+    clock.now += 1
+    assert breaker.before_call(URL).probe
+
+
+def test_released_probe_lets_the_next_call_probe(breaker, clock):
+    _open(breaker)
+    clock.now += 30
+    breaker.release(breaker.before_call(URL))
+    assert breaker.state == HALF_OPEN
+    assert breaker.before_call(URL).probe
+
+
+def test_calls_from_before_the_opening_do_not_count(breaker, clock):
+    late = [breaker.before_call(URL) for _ in range(3)]
+    _open(breaker)
+    opened_at = breaker.opened_at
+
+    clock.now += 10
+    breaker.record_failure(late[0])
+    assert breaker.opened_at == opened_at
+
+    clock.now += 20
+    probe = breaker.before_call(URL)
+    # A late call ending must neither clear the probe nor re-open the breaker
+    breaker.release(late[1])
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(URL)
+    breaker.record_failure(late[2])
+    assert breaker.state == HALF_OPEN and breaker.counters["opened"] == 1
+
+    breaker.record_success(probe)
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_late_success_does_not_close_an_open_breaker(breaker):
+    late = breaker.before_call(URL)
+    _open(breaker)
+    breaker.record_success(late)
+    assert breaker.state == OPEN
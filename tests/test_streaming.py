@@ -0,0 +1,62 @@
+import asyncio
+import json
+import threading
+
+from app.iracing.streaming import SpooledPayload
+
+
+def _payload(value, max_memory_bytes: int = 64) -> SpooledPayload:
+    payload = SpooledPayload(max_memory_bytes)
+    text = json.dumps(value)
+    # Written in pieces, as a download arrives
+    for start in range(0, len(text), 7):
+        payload.write(text[start:start + 7].encode())
+    return payload
+
+
+def test_aiter_items_matches_iter_items_across_batches():
+    rows = [{"id": i, "name": f"row {i}", "lap": -12.5 * i} for i in range(23)]
+
+    async def run():
+        with _payload(rows) as payload:
+            return [row async for row in payload.aiter_items(batch_items=5)]
+
+    assert asyncio.run(run()) == rows
+
+
+def test_aiter_items_runs_off_the_event_loop(monkeypatch):
+    threads = set()
+    original = SpooledPayload.iter_items
+
+    def recording_iter_items(self, *args, **kwargs):
+        for item in original(self, *args, **kwargs):
+            threads.add(threading.get_ident())
+            yield item
+
+    monkeypatch.setattr(SpooledPayload, "iter_items", recording_iter_items)
+
+    async def run():
+        with _payload(list(range(10))) as payload:
+            items = [item async for item in payload.aiter_items(batch_items=3)]
+        return items, threading.get_ident()
+
+    items, loop_thread = asyncio.run(run())
+    assert items == list(range(10))
+    assert threads and loop_thread not in threads
+
+
+def test_aload_decodes_arrays_and_objects():
+    rows = [{"season_id": n, "name": "café"} for n in range(40)]
+    value = {"series": rows}
+
+    async def run():
+        with _payload(rows) as array, _payload(value) as obj:
+            return await array.aload(), await obj.aload()
+
+    assert asyncio.run(run()) == (rows, value)
+
+
+def test_iter_bytes_returns_the_body():
+    value = {"note": "café", "laps": list(range(50))}
+    with _payload(value) as payload:
+        assert b"".join(payload.iter_bytes(chunk_bytes=16)) == json.dumps(value).encode()